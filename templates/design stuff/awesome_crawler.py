@@ -35,9 +35,21 @@
     output_dir = Path(args.output)
     output_dir.mkdir(exist_ok=True)
     
-    # Export results
-    output_file = output_dir / 'crawl_results.json'
-    crawler.export_results(results, str(output_file))
+    # Export results as JSON lines: one repo per line, no giant in-memory document
+    # orjson serializes dataclasses natively, so no per-record asdict() copy is built
+    from dataclasses import asdict
+    try:
+        import orjson
+        dumps = orjson.dumps
+    except ImportError:
+        import json
+        dumps = lambda obj: json.dumps(obj, default=asdict).encode()
+    
+    output_file = output_dir / 'crawl_results.jsonl'
+    with open(output_file, 'wb', buffering=1 << 20) as f:
+        for list_name, repos in results.items():
+            f.writelines(dumps({'list': list_name, 'repo': r}) + b"\n" for r in repos)
+    logger.info(f"💾 Results saved to {output_file}")
     
     # Generate report if requested
     if args.report:
@@ -48,8 +60,10 @@
         logger.info(f"📄 Report saved to {report_file}")
     
     # Print summary
-    total_repos = sum(len(repos) for repos in results.values())
-    high_quality = sum(1 for repos in results.values() for r in repos if (r.relevance_score or 0) >= 7)
+    # Column view of the scores for bulk stats; results stays as-is for export
+    scores = [r.relevance_score or 0 for repos in results.values() for r in repos]
+    total_repos = len(scores)
+    high_quality = sum(score >= 7 for score in scores)
     
     print("\n" + "="*60)
     print("🎉 CRAWL COMPLETE!")
@@ -19,7 +19,7 @@ import time
 import re
 import argparse
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, AsyncIterator, Set
+from typing import List, Dict, Any, Optional, AsyncIterator, Set, ClassVar, Tuple
 from pathlib import Path
 from dataclasses import dataclass, field
 from contextlib import asynccontextmanager
@@ -60,16 +60,16 @@ class CoreConfig:
     FRESH_DAYS: int = 730
     VISION_ENABLED: bool = False
     MAX_IMAGES_PER_REPO: int = 3
-    IMAGE_EXTS: List[str] = field(default_factory=lambda: ['.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp'])
-    IMAGE_PRIORITY: List[str] = field(default_factory=lambda: [
+    IMAGE_EXTS: ClassVar[Tuple[str, ...]] = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp')
+    IMAGE_PRIORITY: ClassVar[Tuple[str, ...]] = (
         'screenshot.png', 'demo.jpg', 'preview.gif', 'ui-theme.svg', 'diagram.png', 'stencil.png',
         'resume-preview.jpg', 'cv-screenshot.png', 'component-diagram.svg'
-    ])
+    )
     SCRAPE_HTML: bool = HAS_BS4
-    DEFAULT_QUERIES: List[str] = field(default_factory=lambda: [
+    DEFAULT_QUERIES: ClassVar[Tuple[str, ...]] = (
         # All your default queries here (abbrev for space)
         'jsonresume-theme stars:>5', 'vue ui component stars:>10', 'awesome vue',  # etc. - paste full from before
-    ])
+    )
     # Add RESUME_TWEAK_QUERIES, STENCIL_QUERIES if needed, but keep core simple
 
     def validate(self):
@@ -2,82 +2,237 @@
 """
 Quick hack: Re-extract sub-repos from top 50 awesomes' READMEs, dedupe, and force-add to raw_themes.db if new.
 Bypasses main.py filters—adds all valid GitHub repos (UI or not; filter later).
-Requires: requests, dotenv (pip install requests python-dotenv).
+Requires: aiohttp, tenacity, dotenv (pip install aiohttp tenacity python-dotenv).
 """
 
 import os
 import json
 import re
 import sqlite3
-import base64
+import asyncio
+import time
+from itertools import islice
+from email.utils import parsedate_to_datetime
 from pathlib import Path
 from dotenv import load_dotenv
-import requests
+import aiohttp
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
 load_dotenv()
 GITHUB_TOKEN = os.getenv('GITHUB_TOKEN', '').strip()
 DB_PATH = Path('raw_themes.db')
 TOP_AWESOMES_JSON = 'top_awesome_repos.json'  # From hunter.py
+MAX_CONCURRENT = 12  # In-flight GitHub requests; much higher trips the secondary rate limit
+RATE_LIMIT_MAX_SLEEP = 60  # Cap on a single Retry-After / reset wait
+# Bulk-ingest profile, per connection only. journal_mode is left alone: raw_themes.db is
+# shared with the other scripts and a WAL switch would persist in the file.
+# synchronous=NORMAL still syncs at checkpoints/commits enough to keep the DB intact on a crash.
+INGEST_PRAGMAS = (
+    "synchronous=NORMAL",
+    "temp_store=MEMORY",
+    "mmap_size=268435456",
+    "cache_size=-65536",
+)
+GRAPHQL_URL = 'https://api.github.com/graphql'
+GRAPHQL_BATCH = 50  # Repos per aliased GraphQL query
+SQL_PARAM_CHUNK = 900  # Stay under SQLITE_MAX_VARIABLE_NUMBER (999 on older builds)
 
-def get_readme(full_name):
+# Match github.com/owner/repo or owner/repo
+_GH_RE = re.compile(r'(?:https://github\.com/)?([a-zA-Z0-9-]+)/([a-zA-Z0-9-_.]+)(?=/|$|\s|\n)')
+HEADERS = {'Authorization': f'token {GITHUB_TOKEN}', 'Accept': 'application/vnd.github.v3+json', 'User-Agent': 'Extractor/1.0'}
+RAW_HEADERS = {'Accept': 'application/vnd.github.raw'}
+
+
+class RetryableStatus(Exception):
+    """429/5xx or rate-limited 403 from GitHub - worth backing off and retrying."""
+
+
+def _parse_retry_after(value):
+    """Retry-After as seconds from now; it may be delta-seconds or an HTTP-date (RFC 9110). 0 if unreadable."""
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return 0.0  # Leave the wait to the exponential backoff
+    return max(0.0, when.timestamp() - time.time())
+
+
+def _retry_delay(resp):
+    """Seconds to sleep before retrying resp, or None if the status isn't retryable."""
+    headers = resp.headers
+    if resp.status == 403:
+        # Plain 403s (permissions, blocked repos) are final; rate-limit 403s say so in the headers
+        if 'Retry-After' in headers:
+            return min(RATE_LIMIT_MAX_SLEEP, _parse_retry_after(headers['Retry-After']))
+        if headers.get('x-ratelimit-remaining') == '0':
+            try:
+                reset = float(headers.get('x-ratelimit-reset', 0))
+            except ValueError:
+                reset = 0.0
+            return min(RATE_LIMIT_MAX_SLEEP, max(0.0, reset - time.time()))
+        return None
+    if resp.status == 429 or resp.status >= 500:
+        return min(RATE_LIMIT_MAX_SLEEP, _parse_retry_after(headers.get('Retry-After', 0)))
+    return None
+
+
+@retry(
+    stop=stop_after_attempt(4),
+    wait=wait_exponential(multiplier=1, min=1, max=10),
+    retry=retry_if_exception_type((RetryableStatus, aiohttp.ClientError, asyncio.TimeoutError))
+)
+async def fetch_json(session, url, raw=False):
+    """GET a GitHub API URL; None on non-retryable failure. raw=True returns the file body as text."""
+    async with session.get(url, headers=RAW_HEADERS if raw else None) as resp:
+        if resp.status == 200:
+            if raw:
+                return (await resp.read()).decode('utf-8', errors='ignore')
+            return await resp.json()
+        status, delay = resp.status, _retry_delay(resp)
+    if delay is None:
+        return None
+    await asyncio.sleep(delay)
+    raise RetryableStatus(f"{status} for {url}")
+
+
+async def bounded(sem, coro):
+    """Run coro under the semaphore; swallow errors that survived retries."""
+    async with sem:
+        try:
+            return await coro
+        except Exception as e:
+            print(f"  Request failed: {e}")
+            return None
+
+
+async def fetch_readme(session, full_name):
     """Fetch README content via GitHub API."""
-    session = requests.Session()
-    headers = {'Authorization': f'token {GITHUB_TOKEN}', 'Accept': 'application/vnd.github.v3+json', 'User-Agent': 'Extractor/1.0'}
-    session.headers.update(headers)
-    url = f"https://api.github.com/repos/{full_name}/readme"
-    resp = session.get(url)
-    if resp.status_code == 200:
-        data = resp.json()
-        content = base64.b64decode(data['content']).decode('utf-8', errors='ignore')
-        return content
-    return ''
+    # Raw media type: GitHub sends the file itself (gzipped on the wire), no base64/JSON wrapping
+    return await fetch_json(session, f"https://api.github.com/repos/{full_name}/readme", raw=True) or ''
+
+
+async def fetch_meta(session, full_name):
+    """Fetch (full_name, desc, stars) row for a repo, or None."""
+    data = await fetch_json(session, f"https://api.github.com/repos/{full_name}")
+    if data:
+        return (full_name, data.get('description', ''), data.get('stargazers_count', 0))
+    return None
+
+
+@retry(
+    stop=stop_after_attempt(4),
+    wait=wait_exponential(multiplier=1, min=1, max=10),
+    retry=retry_if_exception_type((RetryableStatus, aiohttp.ClientError, asyncio.TimeoutError))
+)
+async def post_graphql(session, query, variables):
+    """POST a GraphQL query; None on non-retryable failure."""
+    async with session.post(GRAPHQL_URL, json={'query': query, 'variables': variables}) as resp:
+        if resp.status == 200:
+            return await resp.json()
+        status, delay = resp.status, _retry_delay(resp)
+    if delay is None:
+        return None
+    await asyncio.sleep(delay)
+    raise RetryableStatus(f"{status} for GraphQL batch")
+
+
+async def fetch_meta_batch(session, full_names):
+    """Fetch (full_name, desc, stars) rows for many repos in one aliased GraphQL request."""
+    params, fields, variables = [], [], {}
+    for i, full_name in enumerate(full_names):
+        owner, name = full_name.split('/')
+        params.append(f"$o{i}: String!, $n{i}: String!")
+        fields.append(f"r{i}: repository(owner: $o{i}, name: $n{i}) {{ description stargazerCount }}")
+        variables[f"o{i}"] = owner
+        variables[f"n{i}"] = name
+    query = f"query({', '.join(params)}) {{ {' '.join(fields)} }}"
+
+    # Missing/renamed repos come back as null aliases alongside an errors list
+    repos = ((await post_graphql(session, query, variables)) or {}).get('data') or {}
+    return [
+        (full_name, repo.get('description', ''), repo.get('stargazerCount', 0))
+        for i, full_name in enumerate(full_names)
+        if (repo := repos.get(f"r{i}"))
+    ]
+
 
 def extract_github_links(readme_text):
-    """Regex for GitHub repos in text (owner/repo format)."""
-    # Match github.com/owner/repo or owner/repo
-    links = re.findall(r'(?:https://github\.com/)?([a-zA-Z0-9-]+)/([a-zA-Z0-9-_.]+)(?=/|$|\s|\n)', readme_text)
-    full_names = [f"{owner}/{repo}" for owner, repo in links if len(owner) > 1 and len(repo) > 1 and not owner.startswith('github')]
-    return list(set(full_names))  # Dedupe
-
-# Load top 50 awesomes
-with open(TOP_AWESOMES_JSON, 'r') as f:
-    awesomes = json.load(f)[:50]
-
-new_repos = set()
-for repo in awesomes:
-    full_name = repo['full_name']
-    print(f"Extracting from {full_name}...")
-    readme = get_readme(full_name)
-    if readme:
-        links = extract_github_links(readme)
-        new_repos.update(links)
-        print(f"  Found {len(links)} links")
-
-# Filter basics (non-empty, no internals)
-new_repos = [r for r in new_repos if '/' in r and len(r.split('/')) == 2 and not r.startswith('github/')]
-
-print(f"Total unique new repos: {len(new_repos)}")
-
-# Add to DB if new
-conn = sqlite3.connect(DB_PATH)
-cursor = conn.cursor()
-added = 0
-for full_name in new_repos[:500]:  # Limit to 500 to avoid flood
-    cursor.execute("SELECT full_name FROM themes WHERE full_name = ?", (full_name,))
-    if not cursor.fetchone():
-        # Fetch stars/desc for quality (optional—skip for speed)
-        stars_resp = requests.get(f"https://api.github.com/repos/{full_name}", headers={'Authorization': f'token {GITHUB_TOKEN}', 'User-Agent': 'Extractor/1.0'})
-        if stars_resp.status_code == 200:
-            data = stars_resp.json()
-            stars = data.get('stargazers_count', 0)
-            desc = data.get('description', '')
-            cursor.execute("""
-                INSERT INTO themes (full_name, description, stars, category, processing_status)
-                VALUES (?, ?, ?, 'extracted-awesome', 'raw')
-            """, (full_name, desc, stars))
-            added += 1
-
-conn.commit()
-conn.close()
-print(f"Added {added} new repos to raw_themes.db (total now: $(sqlite3 {DB_PATH} 'SELECT COUNT(*) FROM themes;'))")
+    """Regex for GitHub repos in text (owner/repo format). Returns a set."""
+    seen = set()
+    add = seen.add
+    for m in _GH_RE.finditer(readme_text):
+        owner, repo = m.groups()
+        if len(owner) > 1 and len(repo) > 1 and not owner.startswith('github'):
+            add(f"{owner}/{repo}")
+    return seen
+
+
+async def main():
+    # Load top 50 awesomes
+    with open(TOP_AWESOMES_JSON, 'r') as f:
+        awesomes = json.load(f)[:50]
+
+    sem = asyncio.Semaphore(MAX_CONCURRENT)
+    # One pooled session for every call: api.github.com connections stay open across requests
+    connector = aiohttp.TCPConnector(limit=MAX_CONCURRENT, limit_per_host=MAX_CONCURRENT,
+                                     keepalive_timeout=75, ttl_dns_cache=300)
+    async with aiohttp.ClientSession(connector=connector, headers=HEADERS) as session:
+        names = [repo['full_name'] for repo in awesomes]
+        print(f"Extracting from {len(names)} awesome lists...")
+        readmes = await asyncio.gather(*(bounded(sem, fetch_readme(session, n)) for n in names))
+
+        new_repos = set()
+        for full_name, readme in zip(names, readmes):
+            if readme:
+                links = extract_github_links(readme)
+                new_repos.update(links)
+                print(f"  {full_name}: found {len(links)} links")
+
+        # Filter basics (non-empty, no internals)
+        new_repos = {r for r in new_repos if r.count('/') == 1 and not r.startswith('github/')}
+
+        print(f"Total unique new repos: {len(new_repos)}")
+
+        # Add to DB if new
+        conn = sqlite3.connect(DB_PATH)
+        for pragma in INGEST_PRAGMAS:
+            conn.execute(f"PRAGMA {pragma}")
+        cursor = conn.cursor()
+
+        candidates = list(islice(new_repos, 500))  # Limit to 500 to avoid flood
+        existing = set()
+        for i in range(0, len(candidates), SQL_PARAM_CHUNK):
+            chunk = candidates[i:i + SQL_PARAM_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            existing.update(row[0] for row in cursor.execute(
+                f"SELECT full_name FROM themes WHERE full_name IN ({placeholders})", chunk))
+
+        # Fetch stars/desc for quality, all candidates in flight at once
+        todo = [n for n in candidates if n not in existing]
+        if GITHUB_TOKEN:
+            # GraphQL needs auth; one request per GRAPHQL_BATCH repos instead of one each
+            batches = [todo[i:i + GRAPHQL_BATCH] for i in range(0, len(todo), GRAPHQL_BATCH)]
+            parts = await asyncio.gather(*(bounded(sem, fetch_meta_batch(session, b)) for b in batches))
+            rows = [row for part in parts if part for row in part]
+        else:
+            metas = await asyncio.gather(*(bounded(sem, fetch_meta(session, n)) for n in todo))
+            rows = [m for m in metas if m]
+
+    # Single transaction: one fsync for the whole batch instead of one per row
+    conn.execute("BEGIN IMMEDIATE")
+    cursor.executemany("""
+        INSERT INTO themes (full_name, description, stars, category, processing_status)
+        VALUES (?, ?, ?, 'extracted-awesome', 'raw')
+    """, rows)
+    conn.commit()
+    added = len(rows)
+
+    conn.close()
+    print(f"Added {added} new repos to raw_themes.db (total now: $(sqlite3 {DB_PATH} 'SELECT COUNT(*) FROM themes;'))")
+
 
+if __name__ == '__main__':
+    asyncio.run(main())
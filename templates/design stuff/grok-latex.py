@@ -23,14 +23,22 @@ import time
 import re
 import argparse
 import csv
+import shutil
+import tarfile
+import tempfile
+import multiprocessing
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, AsyncIterator, Set, Union
+from typing import List, Dict, Any, Optional, AsyncIterator, Set, Union, ClassVar, Tuple, Mapping
+from types import MappingProxyType
+from itertools import islice
 from pathlib import Path
 from dataclasses import dataclass, field
 from contextlib import asynccontextmanager
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from dotenv import load_dotenv
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-from tqdm.asyncio import tqdm
+from tqdm import tqdm
 from openai import OpenAI
 from urllib.parse import quote
 
@@ -49,9 +57,70 @@ try:
 except ImportError:
     HAS_GIT = False
 
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
+try:
+    import hyperscan
+    HAS_HYPERSCAN = True
+except ImportError:
+    HAS_HYPERSCAN = False
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+try:
+    import zstandard as zstd
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+try:
+    import aiofiles
+    HAS_AIOFILES = True
+except ImportError:
+    HAS_AIOFILES = False
+
+try:
+    import aiodns  # Backs aiohttp.AsyncResolver
+    HAS_AIODNS = True
+except ImportError:
+    HAS_AIODNS = False
+
+try:
+    import uvloop
+    HAS_UVLOOP = True
+except ImportError:
+    HAS_UVLOOP = False
+
 # Load environment variables
 load_dotenv()
 
+# Characters stripped from stored strings. ASCII text (the common case) goes through an
+# equivalent str.translate table derived from the regex; non-ASCII falls back to the regex.
+_SANITIZE_RE = re.compile(r'[^\w\s\-\.\/\,\:\;\!\?\(\)\[\]\{\}@#\$%\^&\*\+\=\|\\`~]')
+_SANITIZE_TABLE = {c: None for c in range(128) if _SANITIZE_RE.match(chr(c))}
+
+# Template file suffixes, matched case-insensitively without lowering every name
+_TEX_EXT_RE = re.compile(r'\.(?:tex|cls|sty)\Z', re.IGNORECASE)
+_TEX_RE = re.compile(r'\.tex\Z', re.IGNORECASE)
+
+# JSON list columns (sections, packages, keywords, ai_features)
+if HAS_ORJSON:
+    _json_loads = orjson.loads
+    
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+else:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
 # ==============================================================================
 # Configuration
 # ==============================================================================
@@ -80,8 +149,8 @@ class Config:
     TEMP_BATCH_FILE: str = 'temp_batch.json'
     DOWNLOAD_DIR: str = 'templates'
     
-    # Default Queries - Focused on professional, polished templates
-    DEFAULT_QUERIES: List[str] = field(default_factory=lambda: [
+    # Default Queries - Focused on professional, polished templates (shared, immutable)
+    DEFAULT_QUERIES: ClassVar[Tuple[str, ...]] = (
         'latex resume template stars:>50',
         'latex cv template stars:>50',
         'moderncv OR awesome-cv OR altacv template stars:>20',
@@ -96,33 +165,33 @@ class Config:
         'topic:latex-template topic:cover-letter',
         'documentclass resume OR cv language:TeX stars:>15',
         'latex invoice OR letter template professional stars:>5'
-    ])
+    )
     
     # Categories
-    CATEGORIES: List[str] = field(default_factory=lambda: [
+    CATEGORIES: ClassVar[Tuple[str, ...]] = (
         'resume_cv', 'cover_letter', 'thesis_dissertation', 'presentation_slides', 
         'article_paper', 'book_manual', 'letter_memo', 'poster', 'invoice_form', 
         'creative_portfolio', 'academic_bibtex', 'business_proposal', 'report', 
         'technical_diagram', 'general'
-    ])
+    )
     
     # Heuristic Rules
-    HEURISTIC_RULES: Dict[str, List[str]] = field(default_factory=lambda: {
-        'resume_cv': ['resume', 'cv', 'moderncv', 'curriculum', 'job', 'career', 'professional', 'experiences'],
-        'cover_letter': ['cover', 'letter', 'application', 'motivation'],
-        'thesis_dissertation': ['thesis', 'dissertation', 'phd', 'master', 'bachelor', 'graduation', 'laTeXthesis'],
-        'presentation_slides': ['beamer', 'slide', 'presentation', 'talk', 'conference', 'ppt'],
-        'article_paper': ['article', 'paper', 'journal', 'academic', 'research', 'arxiv'],
-        'book_manual': ['book', 'manual', 'documentation', 'guide', 'handbook', 'ebook'],
-        'poster': ['poster', 'conference poster', 'scientific poster', 'a0'],
-        'letter_memo': ['letter', 'memo', 'correspondence', 'email', 'formal'],
-        'invoice_form': ['invoice', 'form', 'template form', 'bill', 'receipt'],
-        'creative_portfolio': ['portfolio', 'design', 'creative', 'graphic', 'typography'],
-        'academic_bibtex': ['bibtex', 'bibliography', 'references', 'cite', 'biber'],
-        'business_proposal': ['proposal', 'business', 'contract', 'pitch', 'grant'],
-        'report': ['report', 'technical report', 'annual report', 'whitepaper'],
-        'technical_diagram': ['tikz', 'pgfplots', 'diagram', 'flowchart', 'circuit'],
-        'general': []
+    HEURISTIC_RULES: ClassVar[Mapping[str, Tuple[str, ...]]] = MappingProxyType({
+        'resume_cv': ('resume', 'cv', 'moderncv', 'curriculum', 'job', 'career', 'professional', 'experiences'),
+        'cover_letter': ('cover', 'letter', 'application', 'motivation'),
+        'thesis_dissertation': ('thesis', 'dissertation', 'phd', 'master', 'bachelor', 'graduation', 'laTeXthesis'),
+        'presentation_slides': ('beamer', 'slide', 'presentation', 'talk', 'conference', 'ppt'),
+        'article_paper': ('article', 'paper', 'journal', 'academic', 'research', 'arxiv'),
+        'book_manual': ('book', 'manual', 'documentation', 'guide', 'handbook', 'ebook'),
+        'poster': ('poster', 'conference poster', 'scientific poster', 'a0'),
+        'letter_memo': ('letter', 'memo', 'correspondence', 'email', 'formal'),
+        'invoice_form': ('invoice', 'form', 'template form', 'bill', 'receipt'),
+        'creative_portfolio': ('portfolio', 'design', 'creative', 'graphic', 'typography'),
+        'academic_bibtex': ('bibtex', 'bibliography', 'references', 'cite', 'biber'),
+        'business_proposal': ('proposal', 'business', 'contract', 'pitch', 'grant'),
+        'report': ('report', 'technical report', 'annual report', 'whitepaper'),
+        'technical_diagram': ('tikz', 'pgfplots', 'diagram', 'flowchart', 'circuit'),
+        'general': ()
     })
     
     def validate(self):
@@ -181,47 +250,101 @@ def setup_logging(verbose: bool = False, log_file: str = 'latex_scraper.log'):
 class RateLimiter:
     """Rate limiter for GitHub API requests"""
     
+    BURST = 100  # Token-bucket capacity: requests that may go out back-to-back
+    
     def __init__(self, token: Optional[str] = None):
         self.token = token
         self._session = None
-        self.remaining = 5000 if token else 60
+        self.limit = 5000 if token else 60
+        self.remaining = self.limit
         self.reset_timestamp = int(time.time()) + 3600
         self.poll_interval = 5
         self.call_count = 0
+        self.from_headers = False
         self.lock = asyncio.Lock()
+        # Token bucket refilled at the hourly quota rate; starts full so batches can burst
+        self.tokens = float(min(self.BURST, self.limit))
+        self.last_refill = time.monotonic()
+    
+    async def _get_session(self):
+        """Lazily create one keep-alive session reused across polls"""
+        if self._session is None or self._session.closed:
+            # Polls are serialized by self.lock, so one kept-alive connection is enough
+            connector = aiohttp.TCPConnector(limit=1, keepalive_timeout=75, force_close=False,
+                                             enable_cleanup_closed=True)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+    
+    async def close(self):
+        """Close the poll session"""
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._session = None
+    
+    def update_from_headers(self, headers):
+        """Track quota from the X-RateLimit-* headers GitHub sends on every response"""
+        # Only the core bucket is tracked; search replies report their own 30/min quota
+        if headers.get('X-RateLimit-Resource') != 'core':
+            return
+        remaining = headers.get('X-RateLimit-Remaining')
+        if remaining is None:
+            return
+        self.remaining = int(remaining)
+        self.reset_timestamp = int(headers.get('X-RateLimit-Reset', self.reset_timestamp))
+        self.limit = int(headers.get('X-RateLimit-Limit', self.limit))
+        self.from_headers = True
+    
+    async def _poll(self):
+        """Refresh quota from /rate_limit (only needed before any response headers are seen)"""
+        session = await self._get_session()
+        headers = {'Authorization': f'token {self.token}'} if self.token else {}
+        try:
+            timeout = aiohttp.ClientTimeout(total=5)
+            async with session.get('https://api.github.com/rate_limit', headers=headers, timeout=timeout) as resp:
+                if resp.status == 200:
+                    data = _json_loads(await resp.read())
+                    core = data['resources']['core']
+                    self.remaining = core['remaining']
+                    self.reset_timestamp = core['reset']
+                    self.limit = core.get('limit', self.limit)
+                else:
+                    logging.warning(f"Rate poll failed: {resp.status}")
+        except Exception as e:
+            logging.debug(f"Rate check error: {e}")
+    
+    async def _take_token(self):
+        """Take one token from the bucket, sleeping only when it is empty"""
+        while True:
+            async with self.lock:
+                # self.limit only ever holds the core quota (headers and poll), so search traffic can't slow the refill
+                rate = self.limit / 3600
+                now = time.monotonic()
+                self.tokens = min(min(self.BURST, self.limit), self.tokens + (now - self.last_refill) * rate)
+                self.last_refill = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_sec = (1 - self.tokens) / rate
+            # Sleep outside the lock so other callers can still refill and check
+            await asyncio.sleep(wait_sec)
     
     async def check_and_wait(self):
         """Check rate limit and wait if necessary"""
+        await self._take_token()
         async with self.lock:
             self.call_count += 1
-            if self.call_count % self.poll_interval != 0 or self.remaining > 100:
+            if self.remaining > 100:
                 return
             
-            if self._session is None:
-                self._session = aiohttp.ClientSession()
+            if not self.from_headers and self.call_count % self.poll_interval == 0:
+                await self._poll()
             
-            headers = {'Authorization': f'token {self.token}'} if self.token else {}
-            try:
-                timeout = aiohttp.ClientTimeout(total=5)
-                async with self._session.get('https://api.github.com/rate_limit', headers=headers, timeout=timeout) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        core = data['resources']['core']
-                        self.remaining = core['remaining']
-                        self.reset_timestamp = core['reset']
-                        if self.remaining < 50:
-                            wait_sec = max(3600 - (int(time.time()) - self.reset_timestamp) + 60, 300)
-                            logging.warning(f"Rate limit low ({self.remaining}), pausing {wait_sec}s")
-                            await asyncio.sleep(wait_sec)
-                            await self.check_and_wait()
-                    else:
-                        logging.warning(f"Rate poll failed: {resp.status}")
-            except Exception as e:
-                logging.debug(f"Rate check error: {e}")
-            finally:
-                if self._session:
-                    await self._session.close()
-                    self._session = None
+            if self.remaining < 50:
+                # reset_timestamp is GitHub's epoch reset time, so this is the one wall-clock read
+                wait_sec = max(self.reset_timestamp - int(time.time()), 0) + 60
+                logging.warning(f"Rate limit low ({self.remaining}), pausing {wait_sec}s")
+                await asyncio.sleep(wait_sec)
+                self.remaining = self.limit
 
 # ==============================================================================
 # Database Manager
@@ -230,9 +353,87 @@ class RateLimiter:
 class DatabaseManager:
     """Database manager for storing template information"""
     
+    # Applied on every connection; journal_mode=WAL also persists in the db file
+    _PRAGMAS = (
+        'journal_mode=WAL',
+        'synchronous=NORMAL',
+        'temp_store=MEMORY',
+        'cache_size=-65536',
+        'mmap_size=268435456',
+        'busy_timeout=30000',
+        # INSERT OR REPLACE deletes the old row; only fires the FTS delete trigger with this on
+        'recursive_triggers=ON',
+    )
+    
+    READER_POOL_SIZE = 2
+    # rebuild() only VACUUMs once this many pages sit on the freelist (~4 MiB at 4 KiB pages)
+    VACUUM_FREELIST_THRESHOLD = 1024
+    
+    # Every status a successfully handled repo can end up in (failures are 'error_*').
+    # Listing them lets the planner probe idx_status instead of scanning for != 'error'.
+    _NON_ERROR_STATUSES = ('scraped', 'scraped_valid', 'scraped_invalid', 'downloaded')
+    _NON_ERROR_IN = f"processing_status IN ({','.join('?' * len(_NON_ERROR_STATUSES))})"
+    
+    # One statement text for every batch, so the connection's statement cache reuses the
+    # prepared statement and executemany() just rebinds and steps it per row
+    _INSERT_COLS = (
+        'repo_name', 'full_name', 'description', 'stars', 'forks', 'url', 'clone_url', 'last_updated',
+        'readme', 'main_tex', 'tex_preview', 'doctype', 'sections', 'packages', 'is_valid',
+        'category', 'ai_description', 'ai_features', 'ai_use_case', 'keywords', 'ats_score',
+        'freshness_days', 'processing_errors', 'processing_status', 'scraped_at',
+    )
+    _INSERT_SQL = (
+        f"INSERT OR REPLACE INTO templates ({', '.join(_INSERT_COLS)}) "
+        f"VALUES ({', '.join('?' * len(_INSERT_COLS))})"
+    )
+    
+    # External-content FTS5 index over the searchable text, kept in sync by triggers
+    _FTS_COLS = 'description, sections, keywords, main_tex'
+    _FTS_SCHEMA = (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS templates_fts USING fts5("
+        f"{_FTS_COLS}, content='templates', content_rowid='id')",
+        f"CREATE TRIGGER IF NOT EXISTS templates_fts_ai AFTER INSERT ON templates BEGIN "
+        f"INSERT INTO templates_fts(rowid, {_FTS_COLS}) "
+        f"VALUES (new.id, new.description, new.sections, new.keywords, new.main_tex); END",
+        f"CREATE TRIGGER IF NOT EXISTS templates_fts_ad AFTER DELETE ON templates BEGIN "
+        f"INSERT INTO templates_fts(templates_fts, rowid, {_FTS_COLS}) "
+        f"VALUES ('delete', old.id, old.description, old.sections, old.keywords, old.main_tex); END",
+        f"CREATE TRIGGER IF NOT EXISTS templates_fts_au AFTER UPDATE OF {_FTS_COLS} ON templates BEGIN "
+        f"INSERT INTO templates_fts(templates_fts, rowid, {_FTS_COLS}) "
+        f"VALUES ('delete', old.id, old.description, old.sections, old.keywords, old.main_tex); "
+        f"INSERT INTO templates_fts(rowid, {_FTS_COLS}) "
+        f"VALUES (new.id, new.description, new.sections, new.keywords, new.main_tex); END",
+    )
+    
+    # Maximum stored length of the free-text columns
+    _FIELD_LIMITS = MappingProxyType({
+        'description': 500,
+        'readme': 10000,
+        'main_tex': 100000,
+        'tex_preview': 1000,
+        'ai_description': 500,
+        'ai_use_case': 300,
+        'processing_errors': 500,
+    })
+    
+    # Columns added after the first schema; legacy DBs get them via ALTER TABLE
+    _REQUIRED_COLS = MappingProxyType({
+        'freshness_days': 'INTEGER DEFAULT 0',
+        'ats_score': 'INTEGER DEFAULT 0',
+        'processing_errors': 'TEXT',
+        'processing_status': 'TEXT DEFAULT "scraped"',
+        'scraped_at': 'TEXT',
+        'ai_description': 'TEXT DEFAULT ""',
+        'ai_features': 'TEXT',
+        'ai_use_case': 'TEXT DEFAULT ""',
+    })
+    
     def __init__(self, db_path: str):
         self.db_path = db_path
-        self._pool = None
+        self._writer = None
+        self._write_lock = asyncio.Lock()
+        self._readers: Optional[asyncio.Queue] = None
+        self.has_fts = False
         self._init_db()
     
     def _init_db(self):
@@ -240,6 +441,11 @@ class DatabaseManager:
         try:
             with sqlite3.connect(self.db_path, timeout=30) as conn:
                 cursor = conn.cursor()
+                for pragma in self._PRAGMAS:
+                    cursor.execute(f'PRAGMA {pragma}')
+                
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='templates'")
+                existed = cursor.fetchone() is not None
                 
                 # Create templates table
                 cursor.execute('''
@@ -273,29 +479,18 @@ class DatabaseManager:
                     )
                 ''')
                 
-                # Check and add missing columns
-                cursor.execute("PRAGMA table_info(templates)")
-                columns = [col[1] for col in cursor.fetchall()]
-                
-                # Add missing columns one by one
-                if 'freshness_days' not in columns:
-                    cursor.execute('ALTER TABLE templates ADD COLUMN freshness_days INTEGER DEFAULT 0')
-                if 'ats_score' not in columns:
-                    cursor.execute('ALTER TABLE templates ADD COLUMN ats_score INTEGER DEFAULT 0')
-                if 'processing_errors' not in columns:
-                    cursor.execute('ALTER TABLE templates ADD COLUMN processing_errors TEXT')
-                if 'processing_status' not in columns:
-                    cursor.execute('ALTER TABLE templates ADD COLUMN processing_status TEXT DEFAULT "scraped"')
-                if 'scraped_at' not in columns:
-                    cursor.execute('ALTER TABLE templates ADD COLUMN scraped_at TEXT')
-                if 'ai_description' not in columns:
-                    cursor.execute('ALTER TABLE templates ADD COLUMN ai_description TEXT DEFAULT ""')
-                if 'ai_features' not in columns:
-                    cursor.execute('ALTER TABLE templates ADD COLUMN ai_features TEXT')
-                if 'ai_use_case' not in columns:
-                    cursor.execute('ALTER TABLE templates ADD COLUMN ai_use_case TEXT DEFAULT ""')
-                
-                conn.commit()
+                # A table we just created already has every column; only legacy DBs need migrating
+                changed = not existed
+                if existed:
+                    cursor.execute("PRAGMA table_info(templates)")
+                    columns = {col[1] for col in cursor.fetchall()}
+                    missing = [col for col in self._REQUIRED_COLS if col not in columns]
+                    if missing:
+                        cursor.execute('BEGIN')
+                        for col in missing:
+                            cursor.execute(f'ALTER TABLE templates ADD COLUMN {col} {self._REQUIRED_COLS[col]}')
+                        conn.commit()
+                        changed = True
                 
                 # Create indexes
                 indexes = [
@@ -304,16 +499,27 @@ class DatabaseManager:
                     'CREATE INDEX IF NOT EXISTS idx_full_name ON templates(full_name)',
                     'CREATE INDEX IF NOT EXISTS idx_freshness ON templates(freshness_days)',
                     'CREATE INDEX IF NOT EXISTS idx_ats_score ON templates(ats_score DESC)',
-                    'CREATE INDEX IF NOT EXISTS idx_status ON templates(processing_status)'
+                    'CREATE INDEX IF NOT EXISTS idx_status ON templates(processing_status)',
+                    # query_top: seek on category/is_valid, walk rows already in stars/forks order,
+                    # and check status/freshness from the index before touching the table
+                    'CREATE INDEX IF NOT EXISTS idx_query_top ON templates('
+                    'category, is_valid, stars DESC, forks DESC, processing_status, freshness_days)',
+                    'CREATE INDEX IF NOT EXISTS idx_fresh_stars ON templates(freshness_days, stars DESC)'
                 ]
                 
+                index_count = self._count_indexes(cursor)
                 for idx in indexes:
                     cursor.execute(idx)
+                # New indexes need fresh stats before the planner will pick them
+                changed = changed or self._count_indexes(cursor) != index_count
                 
-                cursor.execute('PRAGMA vacuum;')
-                cursor.execute('ANALYZE templates;')
+                self.has_fts = self._init_fts(cursor)
                 conn.commit()
                 
+                if changed:
+                    cursor.execute('ANALYZE templates;')
+                    conn.commit()
+                
                 # Integrity check
                 cursor.execute('PRAGMA integrity_check;')
                 integrity = cursor.fetchone()[0]
@@ -326,48 +532,105 @@ class DatabaseManager:
             logging.error(f"Database initialization failed: {e}")
             raise DatabaseError(f"Failed to initialize database: {e}")
     
+    def _init_fts(self, cursor) -> bool:
+        """Create the FTS5 index and sync triggers; False if this SQLite lacks FTS5"""
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name='templates_fts'")
+        existed = cursor.fetchone() is not None
+        # All or nothing: a half-created setup would leave triggers that break every insert
+        cursor.execute('BEGIN')
+        try:
+            for stmt in self._FTS_SCHEMA:
+                cursor.execute(stmt)
+            if not existed:
+                # Index rows that were stored before the FTS table existed
+                cursor.execute("INSERT INTO templates_fts(templates_fts) VALUES ('rebuild')")
+            cursor.execute('COMMIT')
+            return True
+        except sqlite3.OperationalError as e:
+            cursor.execute('ROLLBACK')
+            logging.warning(f"Full-text index unavailable: {e}")
+            return False
+    
+    @staticmethod
+    def _count_indexes(cursor) -> int:
+        """Number of indexes currently defined on the templates table"""
+        cursor.execute("SELECT COUNT(*) FROM sqlite_master WHERE type='index' AND tbl_name='templates'")
+        return cursor.fetchone()[0]
+    
+    async def _connect(self):
+        """Open an aiosqlite connection with the standard pragmas"""
+        # Async iteration pulls iter_chunk_size rows per thread hop (aiosqlite default 64)
+        conn = await aiosqlite.connect(self.db_path, timeout=30, iter_chunk_size=256)
+        for pragma in self._PRAGMAS:
+            await conn.execute(f'PRAGMA {pragma}')
+        return conn
+    
+    async def start(self):
+        """Open the long-lived writer and reader connections (idempotent)"""
+        if self._writer is not None:
+            return
+        async with self._write_lock:
+            if self._writer is not None:
+                return
+            readers = asyncio.Queue()
+            for _ in range(self.READER_POOL_SIZE):
+                readers.put_nowait(await self._connect())
+            self._readers = readers
+            writer = await self._connect()
+            # Long-lived connection: let SQLite refresh stale stats once at open (bounded work)
+            await writer.execute('PRAGMA optimize=0x10002')
+            self._writer = writer
+    
     @asynccontextmanager
     async def get_connection(self):
-        """Get database connection"""
-        conn = await aiosqlite.connect(self.db_path, timeout=30)
+        """Get the shared writer connection (one writer at a time)"""
+        await self.start()
+        async with self._write_lock:
+            yield self._writer
+    
+    @asynccontextmanager
+    async def get_reader(self):
+        """Borrow a reader connection from the pool"""
+        await self.start()
+        conn = await self._readers.get()
         try:
             yield conn
         finally:
-            await conn.close()
+            self._readers.put_nowait(conn)
     
     async def batch_insert_or_update(self, entries: List[Dict]):
         """Insert or update multiple entries in a transaction"""
         if not entries:
             return
         
+        # Sanitizing large tex/readme strings is CPU work; keep it off the event loop
+        # (and outside the writer lock)
+        validated = await asyncio.to_thread(self._validate_entries, entries)
+        
         async with self.get_connection() as conn:
             try:
-                await conn.execute("BEGIN TRANSACTION")
+                # Take the write lock up front: one commit (and WAL sync) per batch
+                await conn.execute("BEGIN IMMEDIATE")
                 
-                for entry in entries:
-                    # Validate and sanitize entry
-                    entry = self._validate_entry(entry)
-                    
-                    await conn.execute('''
-                        INSERT OR REPLACE INTO templates 
-                        (repo_name, full_name, description, stars, forks, url, clone_url, last_updated,
-                         readme, main_tex, tex_preview, doctype, sections, packages, is_valid,
-                         category, ai_description, ai_features, ai_use_case, keywords, ats_score,
-                         freshness_days, processing_errors, processing_status, scraped_at)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        entry['repo_name'], entry['full_name'], entry['description'][:500],
+                # Hand the whole validated batch to sqlite in one call
+                rows = [
+                    (
+                        entry['repo_name'], entry['full_name'], entry['description'],
                         entry['stars'], entry['forks'], entry['url'], entry['clone_url'],
-                        entry['last_updated'], entry['readme'][:10000], entry['main_tex'][:100000],
-                        entry['tex_preview'][:1000], entry['doctype'],
-                        json.dumps(entry['sections']) if entry['sections'] else '[]',
-                        json.dumps(entry['packages']) if entry['packages'] else '[]',
-                        int(entry['is_valid']), entry['category'], entry['ai_description'][:500],
-                        json.dumps(entry['ai_features']) if entry['ai_features'] else '[]',
-                        entry['ai_use_case'][:300], json.dumps(entry['keywords']) if entry['keywords'] else '[]',
-                        entry['ats_score'], entry['freshness_days'], entry['processing_errors'][:500],
+                        entry['last_updated'], entry['readme'], entry['main_tex'],
+                        entry['tex_preview'], entry['doctype'],
+                        _json_dumps(entry['sections']) if entry['sections'] else '[]',
+                        _json_dumps(entry['packages']) if entry['packages'] else '[]',
+                        int(entry['is_valid']), entry['category'], entry['ai_description'],
+                        _json_dumps(entry['ai_features']) if entry['ai_features'] else '[]',
+                        entry['ai_use_case'], _json_dumps(entry['keywords']) if entry['keywords'] else '[]',
+                        entry['ats_score'], entry['freshness_days'], entry['processing_errors'],
                         entry['processing_status'], entry['scraped_at']
-                    ))
+                    )
+                    for entry in validated
+                ]
+                
+                await conn.executemany(self._INSERT_SQL, rows)
                 
                 await conn.commit()
                 logging.info(f"Successfully inserted/updated {len(entries)} entries")
@@ -377,15 +640,25 @@ class DatabaseManager:
                 logging.error(f"Batch insert failed: {e}")
                 raise DatabaseError(f"Failed to insert batch: {e}")
     
-    def _validate_entry(self, entry: Dict) -> Dict:
+    def _validate_entries(self, entries: List[Dict]) -> List[Dict]:
+        """Validate a batch of entries against a single clock reading"""
+        now = datetime.now()
+        now_iso = now.isoformat()
+        return [self._validate_entry(entry, now, now_iso) for entry in entries]
+    
+    def _validate_entry(self, entry: Dict, now: Optional[datetime] = None,
+                        now_iso: Optional[str] = None) -> Dict:
         """Validate and sanitize entry data"""
+        now = now or datetime.now()
+        now_iso = now_iso or now.isoformat()
+        
         # Set defaults
         entry.setdefault('forks', 0)
         entry.setdefault('description', '')
         entry.setdefault('stars', 0)
         entry.setdefault('url', '')
         entry.setdefault('clone_url', '')
-        entry.setdefault('last_updated', datetime.now().isoformat())
+        entry.setdefault('last_updated', now_iso)
         entry.setdefault('readme', '')
         entry.setdefault('main_tex', '')
         entry.setdefault('tex_preview', '')
@@ -400,17 +673,26 @@ class DatabaseManager:
         entry.setdefault('keywords', [])
         entry.setdefault('processing_errors', '')
         
+        # Cut to the stored lengths up front so scoring and sanitizing never scan text we drop
+        for key, limit in self._FIELD_LIMITS.items():
+            value = entry[key]
+            if isinstance(value, str) and len(value) > limit:
+                entry[key] = value[:limit]
+        
         # Calculate derived fields
         entry['ats_score'] = self._calc_ats_score(entry)
-        entry['freshness_days'] = self._calc_freshness(entry.get('last_updated', ''))
-        entry['scraped_at'] = datetime.now().isoformat()
+        entry['freshness_days'] = self._calc_freshness(entry.get('last_updated', ''), now)
+        entry['scraped_at'] = now_iso
         entry['repo_name'] = entry.get('repo_name', entry.get('full_name', '').split('/')[-1] or 'unknown')
         entry['processing_status'] = entry.get('processing_status', 'scraped')
         
         # Sanitize strings
         for key, value in entry.items():
             if isinstance(value, str):
-                entry[key] = re.sub(r'[^\w\s\-\.\/\,\:\;\!\?\(\)\[\]\{\}@#\$%\^&\*\+\=\|\\`~]', '', value)
+                if value.isascii():
+                    entry[key] = value.translate(_SANITIZE_TABLE)
+                else:
+                    entry[key] = _SANITIZE_RE.sub('', value)
         
         return entry
     
@@ -430,14 +712,15 @@ class DatabaseManager:
         
         return min(10, score)
     
-    def _calc_freshness(self, updated_str: str) -> int:
+    def _calc_freshness(self, updated_str: str, now: Optional[datetime] = None) -> int:
         """Calculate freshness in days from last update"""
         if not updated_str:
             return 9999
         try:
             updated = datetime.fromisoformat(updated_str.replace('Z', '+00:00'))
-            now = datetime.now(updated.tzinfo)
-            days = int((now - updated).total_seconds() / 86400)
+            # timestamp() reads naive values as local time, same as datetime.now()
+            seconds = (now or datetime.now()).timestamp() - updated.timestamp()
+            days = int(seconds / 86400)
             return max(0, days)
         except:
             return 9999
@@ -445,9 +728,10 @@ class DatabaseManager:
     async def get_processed_full_names(self) -> Set[str]:
         """Get set of already processed repository names"""
         try:
-            async with self.get_connection() as conn:
-                cursor = await conn.execute('SELECT full_name FROM templates WHERE processing_status != "error"')
-                return {row[0] for row in await cursor.fetchall()}
+            # Stream straight into the set (no fetchall() list); the cursor closes on exit
+            sql = f'SELECT full_name FROM templates WHERE {self._NON_ERROR_IN}'
+            async with self.get_reader() as conn, conn.execute(sql, self._NON_ERROR_STATUSES) as cursor:
+                return {row[0] async for row in cursor}
         except Exception as e:
             logging.error(f"Failed to get processed names: {e}")
             return set()
@@ -456,7 +740,7 @@ class DatabaseManager:
                        fresh_only: bool = False, fresh_days: int = 730) -> List[Dict]:
         """Query top templates by various criteria"""
         try:
-            async with self.get_connection() as conn:
+            async with self.get_reader() as conn:
                 where = []
                 params = []
                 
@@ -474,16 +758,16 @@ class DatabaseManager:
                     SELECT repo_name, full_name, description, category, ai_use_case, stars, forks, url, doctype, keywords,
                            ai_description, ai_features, processing_errors, ats_score, freshness_days, processing_status
                     FROM templates 
-                    WHERE {where_clause} AND stars >= ? AND is_valid = 1 AND processing_status != 'error'
+                    WHERE {where_clause} AND stars >= ? AND is_valid = 1 AND {self._NON_ERROR_IN}
                     ORDER BY stars DESC, forks DESC LIMIT ?
-                ''', params + [min_stars, top_n])
+                ''', [*params, min_stars, *self._NON_ERROR_STATUSES, top_n])
                 
                 rows = await cursor.fetchall()
                 
                 templates = []
                 for row in rows:
-                    kw = json.loads(row[9]) if row[9] else []
-                    feats = json.loads(row[11]) if row[11] else []
+                    kw = _json_loads(row[9]) if row[9] and row[9] != '[]' else []
+                    feats = _json_loads(row[11]) if row[11] and row[11] != '[]' else []
                     templates.append({
                         'repo_name': row[0] or 'unknown',
                         'full_name': row[1],
@@ -512,12 +796,60 @@ class DatabaseManager:
     async def count_rows(self) -> int:
         """Count total rows in database"""
         try:
-            async with self.get_connection() as conn:
+            async with self.get_reader() as conn:
                 cursor = await conn.execute('SELECT COUNT(*) FROM templates')
                 return (await cursor.fetchone())[0]
         except:
             return 0
     
+    async def categorize_batch_fts(self, full_names: List[str],
+                                   rules: Mapping[str, Tuple[str, ...]]) -> Dict[str, str]:
+        """Match stored rows against category keywords via FTS5; first category in rule order wins"""
+        if not self.has_fts or not full_names:
+            return {}
+        
+        remaining = set(full_names)
+        matched: Dict[str, str] = {}
+        try:
+            async with self.get_reader() as conn:
+                for cat, keywords in rules.items():
+                    if not keywords or not remaining:
+                        continue
+                    # Quoted phrases so multi-word keywords and FTS syntax characters match literally
+                    expr = ' OR '.join('"' + kw.replace('"', '""') + '"' for kw in keywords)
+                    names = list(remaining)
+                    cursor = await conn.execute(f'''
+                        SELECT t.full_name FROM templates_fts
+                        JOIN templates t ON t.id = templates_fts.rowid
+                        WHERE templates_fts MATCH ? AND t.full_name IN ({','.join('?' * len(names))})
+                    ''', [expr, *names])
+                    for (full_name,) in await cursor.fetchall():
+                        matched[full_name] = cat
+                        remaining.discard(full_name)
+        except Exception as e:
+            logging.error(f"FTS categorization failed: {e}")
+        return matched
+    
+    async def update_categories(self, entries: List[Dict]):
+        """Write back category fields for already stored entries"""
+        if not entries:
+            return
+        async with self.get_connection() as conn:
+            try:
+                await conn.executemany(
+                    'UPDATE templates SET category = ?, ai_description = ?, ai_features = ?, ai_use_case = ? '
+                    'WHERE full_name = ?',
+                    [
+                        (entry['category'], entry['ai_description'], _json_dumps(list(entry['ai_features'])),
+                         entry['ai_use_case'], entry['full_name'])
+                        for entry in entries
+                    ]
+                )
+                await conn.commit()
+            except Exception as e:
+                await conn.rollback()
+                logging.error(f"Category update failed: {e}")
+    
     async def rebuild(self):
         """Rebuild database indexes and check integrity"""
         try:
@@ -530,8 +862,16 @@ class DatabaseManager:
                     logging.warning(f"Database integrity issue: {integrity} - attempting repair")
                     await conn.execute('REINDEX;')
                 
-                await conn.execute('VACUUM;')
-                await conn.execute('ANALYZE;')
+                # VACUUM rewrites the whole file; skip it when there is little to reclaim
+                cursor = await conn.execute('PRAGMA freelist_count;')
+                free_pages = (await cursor.fetchone())[0]
+                if free_pages > self.VACUUM_FREELIST_THRESHOLD:
+                    await conn.execute('VACUUM;')
+                else:
+                    logging.info(f"Skipping VACUUM: only {free_pages} free pages")
+                # optimize only re-analyzes tables whose stats look stale, sampling ~400 rows each
+                await conn.execute('PRAGMA analysis_limit=400;')
+                await conn.execute('PRAGMA optimize;')
                 await conn.commit()
                 
                 logging.info("Database rebuilt successfully")
@@ -541,9 +881,18 @@ class DatabaseManager:
             raise DatabaseError(f"Failed to rebuild database: {e}")
     
     async def close(self):
-        """Close database connection"""
-        # No pooling, so nothing to close
-        pass
+        """Close database connections"""
+        if self._writer is None:
+            return
+        try:
+            await self._writer.execute('PRAGMA optimize;')
+        except Exception as e:
+            logging.warning(f"PRAGMA optimize on close failed: {e}")
+        await self._writer.close()
+        self._writer = None
+        while not self._readers.empty():
+            await self._readers.get_nowait().close()
+        self._readers = None
 
 # ==============================================================================
 # Checkpoint Manager
@@ -552,39 +901,106 @@ class DatabaseManager:
 class CheckpointManager:
     """Manages checkpointing for resuming interrupted work"""
     
+    ZSTD_LEVEL = 3
+    _ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'  # Frame header; lets _read tell compressed files from plain JSON
+    
     def __init__(self, checkpoint_file: str = Config.CHECKPOINT_FILE, 
                  temp_batch_file: str = Config.TEMP_BATCH_FILE):
         self.checkpoint_file = checkpoint_file
         self.temp_batch_file = temp_batch_file
+        # Processed names go to an append-only log (one per line) so each save only writes
+        # the names added since the last one instead of re-serializing the whole set
+        self.processed_file = f"{checkpoint_file}.processed"
+        self._logged: Optional[Set[str]] = None
+    
+    def _save_processed(self, processed: Set[str], durable: bool = False):
+        """Append newly processed names to the log (rewritten on the first save of a run)"""
+        if self._logged is None or len(processed) < len(self._logged):
+            # First save this run (or the set was reset): start the log over
+            new, mode = processed, 'w'
+            self._logged = set()
+        else:
+            new, mode = processed - self._logged, 'a'
+        
+        with open(self.processed_file, mode, encoding='utf-8', buffering=1 << 20) as f:
+            if new:
+                f.write('\n'.join(new) + '\n')
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        self._logged |= new
+    
+    def _load_processed(self) -> Set[str]:
+        """Read the processed-names log, if any"""
+        try:
+            with open(self.processed_file, encoding='utf-8') as f:
+                return {line for line in f.read().splitlines() if line}
+        except FileNotFoundError:
+            return set()
+    
+    @staticmethod
+    def _write_atomic(path: str, data: Dict, durable: bool = False):
+        """
+        Write compact JSON to a temp file and rename it over path. With zstd available the
+        compressed bytes go to path + '.zst' instead, so other tools reading the same default
+        file names (grok-max.py) never find a compressed file under a .json name
+        """
+        payload = orjson.dumps(data) if HAS_ORJSON else json.dumps(data, separators=(',', ':')).encode()
+        if HAS_ZSTD:
+            payload = zstd.ZstdCompressor(level=CheckpointManager.ZSTD_LEVEL).compress(payload)
+            path = f"{path}.zst"
+        else:
+            Path(f"{path}.zst").unlink(missing_ok=True)  # Or _read would keep preferring the stale one
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb', buffering=1 << 20) as f:
+            f.write(payload)
+            if durable:
+                # Only worth the fsync when the process is about to exit
+                f.flush()
+                os.fsync(f.fileno())
+        # Readers see either the old checkpoint or the new one, never a torn write
+        os.replace(tmp_path, path)
+    
+    @staticmethod
+    def _read(path: str) -> Dict:
+        """Load what _write_atomic wrote for path: the .zst file if present, else the plain JSON one"""
+        if HAS_ZSTD and os.path.exists(f"{path}.zst"):
+            path = f"{path}.zst"
+        with open(path, 'rb') as f:
+            payload = f.read()
+        if payload[:4] == CheckpointManager._ZSTD_MAGIC:
+            if not HAS_ZSTD:
+                raise RuntimeError(f"{path} is zstd-compressed; install zstandard to read it")
+            payload = zstd.ZstdDecompressor().decompress(payload)
+        return _json_loads(payload)
     
     def save(self, processed: Set[str], total_new: int, queries_used: Dict, 
-             start_pages: Dict, query_idx: int):
+             start_pages: Dict, query_idx: int, durable: bool = False):
         """Save checkpoint state"""
         try:
+            self._save_processed(processed, durable)
             data = {
-                'processed': list(processed),
                 'total_new': total_new,
                 'queries_used': queries_used,
                 'start_pages': start_pages,
                 'query_idx': query_idx
             }
-            with open(self.checkpoint_file, 'w') as f:
-                json.dump(data, f, indent=2)
-            logging.info(f"Checkpoint saved to {self.checkpoint_file}")
+            self._write_atomic(self.checkpoint_file, data, durable)
+            logging.info(f"Checkpoint saved to {self.checkpoint_file}{'.zst' if HAS_ZSTD else ''}")
         except Exception as e:
             logging.error(f"Failed to save checkpoint: {e}")
     
     def load(self) -> tuple[Set[str], Dict, int, Dict]:
         """Load checkpoint state"""
         try:
-            with open(self.checkpoint_file, 'r') as f:
-                data = json.load(f)
-                return (
-                    set(data.get('processed', [])),
-                    data.get('start_pages', {}),
-                    data.get('query_idx', 0),
-                    data.get('queries_used', {})
-                )
+            data = self._read(self.checkpoint_file)
+            # Older checkpoints stored the whole set inline
+            return (
+                set(data.get('processed', [])) | self._load_processed(),
+                data.get('start_pages', {}),
+                data.get('query_idx', 0),
+                data.get('queries_used', {})
+            )
         except FileNotFoundError:
             logging.info("No checkpoint found - starting fresh")
             return set(), {}, 0, {}
@@ -596,8 +1012,7 @@ class CheckpointManager:
         """Save batch progress"""
         try:
             data = {'batch': batch, 'context': context}
-            with open(self.temp_batch_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            self._write_atomic(self.temp_batch_file, data)
             logging.debug(f"Batch progress saved to {self.temp_batch_file}")
         except Exception as e:
             logging.error(f"Failed to save batch progress: {e}")
@@ -605,9 +1020,7 @@ class CheckpointManager:
     def load_batch_progress(self) -> List[Dict]:
         """Load batch progress"""
         try:
-            with open(self.temp_batch_file, 'r') as f:
-                data = json.load(f)
-                return data.get('batch', [])
+            return self._read(self.temp_batch_file).get('batch', [])
         except FileNotFoundError:
             return []
         except Exception as e:
@@ -617,6 +1030,7 @@ class CheckpointManager:
     def cleanup(self):
         """Clean up temporary files"""
         Path(self.temp_batch_file).unlink(missing_ok=True)
+        Path(f"{self.temp_batch_file}.zst").unlink(missing_ok=True)
 
 # ==============================================================================
 # LaTeX Analyzer
@@ -631,14 +1045,55 @@ class LaTeXAnalyzer:
         self.config = config or Config()
         
         # Compile regex patterns
-        self.docclass_re = re.compile(r'\\documentclass(?:\s*\[.*?\])?\s*\{([^}]+?)\}')
-        self.section_re = re.compile(r'\\((?:sub)?(?:sub)?section\*?)\s*\{([^}]+?)\}')
-        self.pkg_re = re.compile(r'\\usepackage(?:\s*\[.*?\])?\s*\{([^}]+?)\}')
+        # Document class, sections, packages and document body markers in one alternation;
+        # lastgroup says which matched
+        self.structure_re = re.compile(
+            r'\\documentclass(?:\s*\[.*?\])?\s*\{(?P<cls>[^}]+?)\}'
+            r'|\\(?:sub)?(?:sub)?section\*?\s*\{(?P<sec>[^}]+?)\}'
+            r'|\\usepackage(?:\s*\[.*?\])?\s*\{(?P<pkg>[^}]+?)\}'
+            r'|(?P<begin_doc>\\begin\s*\{\s*document\s*\})'
+            r'|(?P<end_doc>\\end\s*\{\s*document\s*\})'
+        )
+        self.command_re = re.compile(r'[a-zA-Z]+\{')
+        self.word_re = re.compile(r'\w+')
         self.comment_re = re.compile(r'%.*', re.MULTILINE)
         
         # Build keyword regex
-        all_keywords = sum(self.config.HEURISTIC_RULES.values(), [])
+        all_keywords = sum(self.config.HEURISTIC_RULES.values(), ())
         self.keyword_re = re.compile(r'(?i)\b(?:' + '|'.join(all_keywords) + r')\b')
+        
+        # DFA scan over raw bytes when Hyperscan is installed: one pattern per distinct keyword,
+        # each reported at most once, so the set of matched ids is the keyword list
+        self.keyword_db = None
+        if HAS_HYPERSCAN:
+            self.keyword_ids = tuple(dict.fromkeys(all_keywords))
+            self.keyword_db = hyperscan.Database()
+            self.keyword_db.compile(
+                expressions=[rb'\b' + re.escape(kw).encode() + rb'\b' for kw in self.keyword_ids],
+                ids=list(range(len(self.keyword_ids))),
+                elements=len(self.keyword_ids),
+                flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(self.keyword_ids)
+            )
+        
+        # Same keywords as a single-pass matcher over lowered content: keyword -> (length, keyword)
+        self.keyword_automaton = None
+        if HAS_AHOCORASICK:
+            self.keyword_automaton = ahocorasick.Automaton()
+            for kw in all_keywords:
+                self.keyword_automaton.add_word(kw.lower(), (len(kw), kw))
+            self.keyword_automaton.make_automaton()
+        
+        # Single-pass matcher for heuristic categorization: keyword -> categories it belongs to
+        self.category_automaton = None
+        if HAS_AHOCORASICK:
+            keyword_cats: Dict[str, List[str]] = {}
+            for cat, keywords in self.config.HEURISTIC_RULES.items():
+                for kw in keywords:
+                    keyword_cats.setdefault(kw, []).append(cat)
+            self.category_automaton = ahocorasick.Automaton()
+            for kw, cats in keyword_cats.items():
+                self.category_automaton.add_word(kw, tuple(cats))
+            self.category_automaton.make_automaton()
     
     def parse_tex(self, content: str) -> Dict[str, Any]:
         """Parse LaTeX content and extract structure"""
@@ -662,24 +1117,41 @@ class LaTeXAnalyzer:
             parsed['error'] = 'Empty/short content (skipped)'
             return parsed
         
-        # Extract document class
-        doctype_match = self.docclass_re.search(content)
-        if doctype_match:
-            parsed['doctype'] = doctype_match.group(1).strip()
-        
-        # Extract sections
-        sections = self.section_re.findall(content)
-        parsed['sections'] = list(set(sec[1].strip() for sec in sections[:30]))
+        # Extract document class, sections and packages in a single scan
+        # Dicts dedupe while keeping first-seen order
+        doctype = None
+        sections, packages = {}, {}
+        has_begin_doc = has_end_doc = False
+        for m in self.structure_re.finditer(content):
+            kind = m.lastgroup
+            if kind == 'sec':
+                if len(sections) < 30:
+                    sections[m.group('sec').strip()] = None
+            elif kind == 'pkg':
+                if len(packages) < 50:
+                    packages[m.group('pkg').strip()] = None
+            elif kind == 'cls':
+                if doctype is None:
+                    doctype = m.group('cls')
+            elif kind == 'begin_doc':
+                has_begin_doc = True
+            else:
+                has_end_doc = True
+            
+            # Nothing left to learn from the rest of a long file
+            if (has_end_doc and has_begin_doc and doctype is not None
+                    and len(sections) >= 30 and len(packages) >= 50):
+                break
         
-        # Extract packages
-        packages = self.pkg_re.findall(content)
-        parsed['packages'] = list(set(pkg.strip() for pkg in packages[:50]))
+        if doctype is not None:
+            parsed['doctype'] = doctype.strip()
+        parsed['sections'] = list(sections)
+        parsed['packages'] = list(packages)
         
         # Check validity
-        has_begin_doc = r'\begin\s*\{\s*document\s*\}' in content
-        has_end_doc = r'\end\s*\{\s*document\s*\}' in content
         has_docclass = parsed['doctype'] != 'unknown'
-        has_content = len(re.findall(r'[a-zA-Z]+\{', content)) > 2
+        # Only need to know there are more than two commands, so stop at the third
+        has_content = next(islice(self.command_re.finditer(content), 2, None), None) is not None
         
         parsed['is_valid'] = (
             has_docclass and 
@@ -689,22 +1161,24 @@ class LaTeXAnalyzer:
             len(content) > 200
         )
         
+        lower = content.lower()
+        
         # Extract keywords
-        keyword_matches = list(set(self.keyword_re.findall(content)))
+        keyword_matches = self._find_keywords(content, lower)
         parsed['keywords'] = [kw for kw in keyword_matches if len(kw) > 2]
         
         # Check for special features
         parsed['has_tikz'] = (
             any('tikz' in p.lower() for p in parsed['packages']) or 
-            'tikzpicture' in content.lower()
+            'tikzpicture' in lower
         )
         parsed['has_bibtex'] = any(
-            kw in content.lower() 
+            kw in lower 
             for kw in ['bibliography', 'bibtex', r'\\cite']
         )
         
         # Calculate word count
-        parsed['word_count'] = len(re.findall(r'\w+', content))
+        parsed['word_count'] = sum(1 for _ in self.word_re.finditer(content))
         
         # Create preview
         preview_len = min(2000, len(content))
@@ -718,6 +1192,32 @@ class LaTeXAnalyzer:
         
         return parsed
     
+    def _find_keywords(self, content: str, lower: Optional[str] = None) -> List[str]:
+        """Distinct heuristic keywords appearing as whole words in content"""
+        if self.keyword_db is not None:
+            hits = set()
+            self.keyword_db.scan(
+                content.encode('utf-8', errors='ignore'),
+                match_event_handler=lambda kw_id, start, end, flags, ctx: hits.add(kw_id)
+            )
+            return [self.keyword_ids[kw_id] for kw_id in hits]
+        
+        if self.keyword_automaton is None:
+            return list(set(self.keyword_re.findall(content)))
+        
+        lower = content.lower() if lower is None else lower
+        last = len(lower) - 1
+        found = set()
+        for end, (length, kw) in self.keyword_automaton.iter(lower):
+            start = end - length + 1
+            # Enforce the \b...\b boundaries the regex version had
+            if start > 0 and (lower[start - 1].isalnum() or lower[start - 1] == '_'):
+                continue
+            if end < last and (lower[end + 1].isalnum() or lower[end + 1] == '_'):
+                continue
+            found.add(kw)
+        return list(found)
+    
     async def ai_categorize_batch(self, entries: List[Dict]) -> List[Dict]:
         """Categorize entries using AI"""
         if not self.use_ai:
@@ -791,14 +1291,29 @@ class LaTeXAnalyzer:
             entry.get('preview_code', '')
         ).lower()
         
-        for cat, keywords in self.config.HEURISTIC_RULES.items():
-            if any(kw in text for kw in keywords):
-                return {
-                    'category': cat,
-                    'ai_description': f"Heuristic: {cat.replace('_', ' ').title()} template",
-                    'ai_features': keywords[:5],
-                    'ai_use_case': f"Use for {cat.replace('_', ' ').title()}"
-                }
+        if self.category_automaton is not None:
+            hits = set()
+            for _, cats in self.category_automaton.iter(text):
+                hits.update(cats)
+            matches = (cat for cat in self.config.HEURISTIC_RULES if cat in hits)
+        else:
+            matches = (
+                cat for cat, keywords in self.config.HEURISTIC_RULES.items()
+                if any(kw in text for kw in keywords)
+            )
+        
+        # First category in rule order wins, same as the plain substring scan
+        return self._heuristic_fields(next(matches, None))
+    
+    def _heuristic_fields(self, cat: Optional[str]) -> Dict:
+        """Category fields for a heuristic match (or the general fallback)"""
+        if cat:
+            return {
+                'category': cat,
+                'ai_description': f"Heuristic: {cat.replace('_', ' ').title()} template",
+                'ai_features': self.config.HEURISTIC_RULES[cat][:5],
+                'ai_use_case': f"Use for {cat.replace('_', ' ').title()}"
+            }
         
         return {
             'category': 'general',
@@ -807,6 +1322,16 @@ class LaTeXAnalyzer:
             'ai_use_case': 'General template'
         }
 
+# Analyzer used inside parse-pool worker processes, built on first use in each worker
+_worker_analyzer: Optional[LaTeXAnalyzer] = None
+
+def _parse_tex_in_worker(content: str) -> Dict[str, Any]:
+    """ProcessPoolExecutor entry point for LaTeXAnalyzer.parse_tex"""
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        _worker_analyzer = LaTeXAnalyzer()
+    return _worker_analyzer.parse_tex(content)
+
 # ==============================================================================
 # GitHub Fetcher
 # ==============================================================================
@@ -814,33 +1339,56 @@ class LaTeXAnalyzer:
 class GitHubFetcher:
     """Fetches repository information from GitHub API"""
     
+    GRAPHQL_URL = 'https://api.github.com/graphql'
+    SEARCH_URL = 'https://api.github.com/search/repositories'
+    ETAG_CACHE_SIZE = 2048  # Most recently used responses kept for conditional GETs
+    MAX_OPEN_FILES = 16  # Concurrent downloads being written to disk
+    MAX_FILE_BYTES = 2 << 20  # Larger template files are generated output, not worth fetching
+    
     def __init__(self, token: Optional[str] = None, rate_limiter: Optional[RateLimiter] = None):
         self.token = token
         self.rate_limiter = rate_limiter
         self._session = None
+        # (url, sorted params) -> (ETag, parsed body); a 304 replays the body for free
+        self._etag_cache: OrderedDict = OrderedDict()
+        self._file_sem = asyncio.Semaphore(self.MAX_OPEN_FILES)
         
-        self.base_headers = {
+        base_headers = {
             'Accept': 'application/vnd.github.v3+json',
             'User-Agent': 'LaTeX-Template-Agent/1.0'
         }
         
         if token:
-            self.base_headers['Authorization'] = f'token {token}'
-        
-        self.default_params = {'fork': 'false', 'archived': 'false'}
+            base_headers['Authorization'] = f'token {token}'
+        
+        # Built once and read-only, so every request can pass them as-is without copying
+        self.base_headers = MappingProxyType(base_headers)
+        self.default_params = MappingProxyType({'fork': 'false', 'archived': 'false'})
+        self._default_params_key = tuple(sorted(self.default_params.items()))
+        self.timeout = aiohttp.ClientTimeout(total=30)
+        # Tarballs can take a while in total; only bail if the stream stalls
+        self.tarball_timeout = aiohttp.ClientTimeout(total=None, sock_read=30)
     
     async def get_session(self):
-        """Get or create HTTP session"""
+        """Get or create HTTP session (kept open for the agent's lifetime, closed in close())"""
         if not self._session or self._session.closed:
-            connector = aiohttp.TCPConnector(limit=100, limit_per_host=30)
-            timeout = aiohttp.ClientTimeout(total=30)
-            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            # Pooled keep-alive connections to api.github.com / raw.githubusercontent.com skip
+            # repeated TLS handshakes; asyncio already sets TCP_NODELAY on every socket.
+            # With aiodns, lookups run on the loop instead of blocking a getaddrinfo thread
+            connector = aiohttp.TCPConnector(
+                limit=100, limit_per_host=30, use_dns_cache=True, ttl_dns_cache=300,
+                keepalive_timeout=75, force_close=False,
+                resolver=aiohttp.AsyncResolver() if HAS_AIODNS else None
+            )
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
         return self._session
     
     async def close(self):
         """Close HTTP session"""
         if self._session and not self._session.closed:
             await self._session.close()
+        if self.rate_limiter:
+            await self.rate_limiter.close()
     
     @retry(
         stop=stop_after_attempt(3),
@@ -853,15 +1401,31 @@ class GitHubFetcher:
             await self.rate_limiter.check_and_wait()
         
         session = await self.get_session()
+        if params:
+            cache_key = (url, tuple(sorted(params.items())))
+        else:
+            params = self.default_params
+            cache_key = (url, self._default_params_key)
+        cached = self._etag_cache.get(cache_key)
+        headers = {**self.base_headers, 'If-None-Match': cached[0]} if cached else self.base_headers
         
         try:
-            async with session.get(
-                url, 
-                headers=self.base_headers, 
-                params=params or self.default_params
-            ) as resp:
-                if resp.status == 200:
-                    return await resp.json()
+            async with session.get(url, headers=headers, params=params) as resp:
+                if self.rate_limiter:
+                    self.rate_limiter.update_from_headers(resp.headers)
+                
+                if resp.status == 304 and cached:
+                    self._etag_cache.move_to_end(cache_key)
+                    return cached[1]
+                elif resp.status == 200:
+                    data = _json_loads(await resp.read())
+                    etag = resp.headers.get('ETag')
+                    if etag:
+                        self._etag_cache[cache_key] = (etag, data)
+                        self._etag_cache.move_to_end(cache_key)
+                        if len(self._etag_cache) > self.ETAG_CACHE_SIZE:
+                            self._etag_cache.popitem(last=False)
+                    return data
                 elif resp.status == 403:
                     raise RateLimitError(f"Rate limit exceeded for {url}")
                 elif resp.status == 404:
@@ -877,6 +1441,85 @@ class GitHubFetcher:
             logging.error(f"Client error for {url}: {e}")
             return {}
     
+    async def _post_graphql(self, query: str, variables: Dict) -> Optional[Dict]:
+        """POST a GraphQL query; returns its data object, or None if GraphQL is unusable"""
+        if not self.token:
+            return None  # GraphQL requires authentication
+        if self.rate_limiter:
+            await self.rate_limiter.check_and_wait()
+        
+        session = await self.get_session()
+        try:
+            async with session.post(
+                self.GRAPHQL_URL,
+                headers=self.base_headers,
+                json={'query': query, 'variables': variables}
+            ) as resp:
+                if resp.status != 200:
+                    logging.warning(f"GraphQL request failed: Status {resp.status}")
+                    return None
+                body = _json_loads(await resp.read())
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            logging.warning(f"GraphQL request failed: {e}")
+            return None
+        
+        # Missing repos come back as null aliases next to an errors list; that's fine
+        return body.get('data')
+    
+    async def _query_objects(self, targets: Dict[int, Tuple[str, str]], fragment: str) -> Optional[Dict]:
+        """Resolve many repo git objects in one query: alias r<i> -> (full_name, expression)"""
+        params, fields, variables = [], [], {}
+        for i, (full_name, expression) in targets.items():
+            owner, name = full_name.split('/', 1)
+            params.append(f"$o{i}: String!, $n{i}: String!, $e{i}: String!")
+            fields.append(
+                f"r{i}: repository(owner: $o{i}, name: $n{i}) "
+                f"{{ object(expression: $e{i}) {{ {fragment} }} }}"
+            )
+            variables.update({f"o{i}": owner, f"n{i}": name, f"e{i}": expression})
+        query = f"query({', '.join(params)}) {{ {' '.join(fields)} }}"
+        return await self._post_graphql(query, variables)
+    
+    async def fetch_tex_batch(self, full_names: List[str]) -> Optional[Dict[str, Optional[str]]]:
+        """Main .tex source for many repos in two GraphQL requests (root listing, then blobs).
+        
+        Returns None if GraphQL is unavailable. Otherwise maps full_name -> tex text; repos
+        without a root .tex file are absent, and None marks a blob GraphQL couldn't return
+        (binary or truncated) that should be fetched over REST.
+        """
+        if not full_names:
+            return {}
+        
+        data = await self._query_objects(
+            {i: (full_name, 'HEAD:') for i, full_name in enumerate(full_names)},
+            '... on Tree { entries { name type } }'
+        )
+        if data is None:
+            return None
+        
+        chosen = {}
+        for i, full_name in enumerate(full_names):
+            tree = (data.get(f"r{i}") or {}).get('object') or {}
+            tex_name = next((
+                entry['name'] for entry in tree.get('entries') or []
+                if entry.get('type') == 'blob' and _TEX_RE.search(entry['name'])
+            ), None)
+            if tex_name:
+                chosen[i] = (full_name, f"HEAD:{tex_name}")
+        
+        if not chosen:
+            return {}
+        data = await self._query_objects(chosen, '... on Blob { text isTruncated }')
+        if data is None:
+            return None
+        
+        texts = {}
+        for i, (full_name, _) in chosen.items():
+            blob = (data.get(f"r{i}") or {}).get('object') or {}
+            text = blob.get('text')
+            texts[full_name] = text if text is not None and not blob.get('isTruncated') else None
+        return texts
+    
     async def discover_repos_stream(self, queries: List[str], max_repos: int, 
                                    start_page: int = 1) -> AsyncIterator[Dict]:
         """Discover repositories matching queries"""
@@ -885,19 +1528,17 @@ class GitHubFetcher:
         
         for query in queries:
             page = start_page
+            # One dict per query; only the page number changes between requests
+            params = {
+                'q': query,
+                'sort': 'stars',
+                'order': 'desc',
+                'per_page': per_page,
+                'page': page
+            }
             while repos_fetched < max_repos:
-                params = {
-                    'q': query,
-                    'sort': 'stars',
-                    'order': 'desc',
-                    'per_page': per_page,
-                    'page': page
-                }
-                
-                data = await self._fetch_json(
-                    'https://api.github.com/search/repositories', 
-                    params
-                )
+                params['page'] = page
+                data = await self._fetch_json(self.SEARCH_URL, params)
                 
                 items = data.get('items', [])
                 if not items:
@@ -925,23 +1566,36 @@ class GitHubFetcher:
                 if not data.get('items'):
                     break
     
+    @staticmethod
+    def local_repo_dir(repo_info: Dict, output_dir: Path) -> Path:
+        """Where download_repo puts a repository's files"""
+        full_name = repo_info['full_name']
+        category = repo_info.get('category', 'general')
+        repo_name = repo_info.get('repo_name', full_name.split('/')[-1])
+        return output_dir / category / repo_name
+    
     async def download_repo(self, repo_info: Dict, output_dir: Path, 
                            method: str = 'git') -> bool:
         """Download repository files locally"""
         full_name = repo_info['full_name']
-        category = repo_info.get('category', 'general')
-        repo_name = repo_info.get('repo_name', full_name.split('/')[-1])
-        local_repo_dir = output_dir / category / repo_name
+        local_repo_dir = self.local_repo_dir(repo_info, output_dir)
         local_repo_dir.mkdir(parents=True, exist_ok=True)
         
         repo_info['local_path'] = str(local_repo_dir)
         
         try:
             if method == 'git' and HAS_GIT:
-                git.Repo.clone_from(repo_info['clone_url'], local_repo_dir, depth=1)
+                # Clone in a worker thread so other downloads keep running; shallow, one branch, no tags
+                await asyncio.to_thread(
+                    git.Repo.clone_from, repo_info['clone_url'], str(local_repo_dir),
+                    depth=1, single_branch=True, no_tags=True
+                )
                 logging.info(f"Cloned {full_name} to {local_repo_dir}")
                 return True
             
+            if method == 'tarball':
+                return await self._download_tarball(repo_info, local_repo_dir)
+            
             # Fallback to raw file download
             return await self._download_raw_files(repo_info, local_repo_dir)
             
@@ -951,6 +1605,99 @@ class GitHubFetcher:
             repo_info['processing_status'] = 'error_download'
             return False
     
+    async def _stream_to_file(self, session, url: str, path: Path, headers: Dict = None,
+                              timeout: aiohttp.ClientTimeout = None,
+                              max_bytes: Optional[int] = None) -> bool:
+        """Stream a download to disk without blocking the event loop.
+        
+        False on non-200 or when the body exceeds max_bytes (nothing is left on disk then).
+        """
+        async with self._file_sem:
+            async with session.get(url, headers=headers, timeout=timeout or self.timeout) as resp:
+                if resp.status != 200:
+                    return False
+                if max_bytes is not None and (resp.content_length or 0) > max_bytes:
+                    return False
+                
+                written = 0
+                try:
+                    if HAS_AIOFILES:
+                        async with aiofiles.open(path, 'wb', buffering=1 << 20) as f:
+                            async for chunk in resp.content.iter_chunked(1 << 16):
+                                written += len(chunk)
+                                if max_bytes is not None and written > max_bytes:
+                                    break  # No (or a lying) Content-Length
+                                await f.write(chunk)
+                    else:
+                        body = await resp.read()
+                        written = len(body)
+                        if max_bytes is None or written <= max_bytes:
+                            await asyncio.to_thread(path.write_bytes, body)
+                except BaseException:
+                    # Don't leave a partial file that later runs would skip as already downloaded
+                    path.unlink(missing_ok=True)
+                    raise
+                
+                if max_bytes is not None and written > max_bytes:
+                    path.unlink(missing_ok=True)
+                    return False
+                return True
+    
+    async def _download_tarball(self, repo_info: Dict, local_repo_dir: Path) -> bool:
+        """Download the repository as one tarball and extract only the template files"""
+        session = await self.get_session()
+        full_name = repo_info['full_name']
+        if self.rate_limiter:
+            await self.rate_limiter.check_and_wait()
+        
+        fd, tmp_name = tempfile.mkstemp(suffix='.tar.gz')
+        os.close(fd)
+        archive = Path(tmp_name)
+        try:
+            # One GET (redirected to codeload) instead of a git negotiation + checkout
+            ok = await self._stream_to_file(
+                session, f"https://api.github.com/repos/{full_name}/tarball", archive,
+                headers=self.base_headers, timeout=self.tarball_timeout
+            )
+            if not ok:
+                logging.warning(f"Tarball download failed for {full_name}")
+                return False
+            
+            extracted = await asyncio.to_thread(self._extract_template_files, archive, local_repo_dir)
+            if extracted:
+                logging.info(f"Extracted {extracted} files from {full_name} tarball")
+            else:
+                logging.warning(f"No new files extracted for {full_name}")
+            return extracted > 0
+        finally:
+            archive.unlink(missing_ok=True)
+    
+    @staticmethod
+    def _extract_template_files(archive: Path, dest: Path) -> int:
+        """Extract .tex/.cls/.sty files and the root README from a GitHub tarball"""
+        extracted = 0
+        with tarfile.open(archive, mode='r|gz') as tar:
+            for member in tar:
+                if not member.isfile():
+                    continue
+                # Drop GitHub's "<owner>-<repo>-<sha>/" prefix; never follow ".." out of dest
+                parts = Path(member.name).parts[1:]
+                if not parts or '..' in parts:
+                    continue
+                name = parts[-1]
+                is_readme = len(parts) == 1 and name.upper().startswith('README')
+                if not (is_readme or _TEX_EXT_RE.search(name)):
+                    continue
+                
+                target = dest.joinpath(*parts)
+                if target.exists():
+                    continue
+                target.parent.mkdir(parents=True, exist_ok=True)
+                with tar.extractfile(member) as src, open(target, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, 1 << 20)
+                extracted += 1
+        return extracted
+    
     async def _download_raw_files(self, repo_info: Dict, local_repo_dir: Path) -> bool:
         """Download repository files using raw URLs"""
         session = await self.get_session()
@@ -964,25 +1711,33 @@ class GitHubFetcher:
             # Filter for relevant files
             tex_files = [
                 c for c in contents 
-                if c.get('name', '').lower().endswith(('.tex', '.cls', '.sty'))
+                if _TEX_EXT_RE.search(c.get('name') or '')
             ][:10]
             
+            # The listing already carries sizes, so oversized files cost no request at all
+            todo = []
+            for f in tex_files:
+                if (f.get('size') or 0) > self.MAX_FILE_BYTES:
+                    logging.debug(f"Skipping {f['name']} from {full_name}: {f['size']} bytes")
+                elif not (local_repo_dir / f['name']).exists():
+                    todo.append(f)
+            
+            # Download all files concurrently, each streamed straight to disk
+            results = await asyncio.gather(*(
+                self._stream_to_file(
+                    session, f['download_url'], local_repo_dir / f['name'],
+                    max_bytes=self.MAX_FILE_BYTES
+                )
+                for f in todo
+            ), return_exceptions=True)
+            
             downloaded = 0
-            for file in tex_files:
-                file_path = local_repo_dir / file['name']
-                if file_path.exists():
-                    continue
-                
-                async with session.get(
-                    file['download_url'], 
-                    timeout=aiohttp.ClientTimeout(total=30)
-                ) as resp:
-                    if resp.status == 200:
-                        content = await resp.text()
-                        with open(file_path, 'w', encoding='utf-8') as f:
-                            f.write(content)
-                        downloaded += 1
-                        logging.debug(f"Downloaded {file['name']} to {file_path}")
+            for file, result in zip(todo, results):
+                if isinstance(result, Exception):
+                    logging.debug(f"Download of {file['name']} failed for {full_name}: {result}")
+                elif result:
+                    downloaded += 1
+                    logging.debug(f"Downloaded {file['name']} to {local_repo_dir / file['name']}")
             
             # Try to download README
             try:
@@ -992,10 +1747,7 @@ class GitHubFetcher:
                 if 'download_url' in readme_data:
                     readme_path = local_repo_dir / 'README.md'
                     if not readme_path.exists():
-                        async with session.get(readme_data['download_url']) as resp:
-                            if resp.status == 200:
-                                with open(readme_path, 'w') as f:
-                                    f.write(await resp.text())
+                        await self._stream_to_file(session, readme_data['download_url'], readme_path)
             except Exception as e:
                 logging.debug(f"README download failed for {full_name}: {e}")
             
@@ -1018,6 +1770,9 @@ class GitHubFetcher:
 class LaTeXTemplateAgent:
     """Main agent class for orchestrating the scraping process"""
     
+    PARSE_POOL_WORKERS = 4
+    PARSE_POOL_MIN_CHARS = 64 * 1024  # Smaller sources parse faster in-process than the pickling round trip
+    
     def __init__(self, config: Config, db_manager: Optional[DatabaseManager] = None,
                  fetcher: Optional[GitHubFetcher] = None, analyzer: Optional[LaTeXAnalyzer] = None,
                  checkpoint: Optional[CheckpointManager] = None):
@@ -1048,6 +1803,7 @@ class LaTeXTemplateAgent:
         # Control variables
         self.semaphore = asyncio.Semaphore(config.MAX_CONCURRENT)
         self.shutdown_flag = False
+        self._parse_pool: Optional[ProcessPoolExecutor] = None
     
     async def run(self, max_repos: int = None, resume: bool = True, 
                   force_fresh: bool = False, custom_query: str = None,
@@ -1085,69 +1841,62 @@ class LaTeXTemplateAgent:
         
         try:
             # Main scraping loop
-            async with await self.fetcher.get_session():
-                pbar = tqdm(total=max_repos, desc="Scraping Templates", unit="repo")
+            # Session stays open across runs; cleanup() closes it
+            await self.fetcher.get_session()
+            
+            # Redraw at most twice a second; skipped repos are added in bulk, not one by one
+            pbar = tqdm(
+                total=max_repos, desc="Scraping Templates", unit="repo",
+                mininterval=0.5, maxinterval=2.0, miniters=50, smoothing=0
+            )
+            
+            for q_idx in range(query_idx, len(queries)):
+                if self.shutdown_flag:
+                    logging.warning("Shutdown requested - saving state")
+                    break
                 
-                for q_idx in range(query_idx, len(queries)):
-                    if self.shutdown_flag:
-                        logging.warning("Shutdown requested - saving state")
-                        break
-                    
-                    query = queries[q_idx]
-                    start_page = start_pages.get(query, 1)
-                    
-                    # Stream repositories
-                    stream = self.fetcher.discover_repos_stream(
+                query = queries[q_idx]
+                start_page = start_pages.get(query, 1)
+                
+                # Stream repositories; the next search page is fetched while a batch is processed
+                stream = self._prefetch(
+                    self.fetcher.discover_repos_stream(
                         [query], 
                         max_repos // len(queries), 
                         start_page
-                    )
+                    ),
+                    2 * self.config.BATCH_SIZE
+                )
+                
+                batch = self.checkpoint.load_batch_progress() or []
+                current_page = start_page
+                skipped = 0
+                
+                async for repo_info in stream:
+                    if self.shutdown_flag:
+                        logging.info("Graceful shutdown - saving batch")
+                        self.checkpoint.save_batch_progress(
+                            batch, 
+                            {'query': query, 'page': current_page}
+                        )
+                        self._save_checkpoint(
+                            processed, total_new, queries_used, 
+                            start_pages, q_idx
+                        )
+                        await stream.aclose()  # Stops the prefetch task now, not at garbage collection
+                        break
                     
-                    batch = self.checkpoint.load_batch_progress() or []
-                    current_page = start_page
+                    full_name = repo_info['full_name']
+                    if full_name in processed:
+                        skipped += 1
+                        continue
                     
-                    async for repo_info in stream:
-                        if self.shutdown_flag:
-                            logging.info("Graceful shutdown - saving batch")
-                            self.checkpoint.save_batch_progress(
-                                batch, 
-                                {'query': query, 'page': current_page}
-                            )
-                            self._save_checkpoint(
-                                processed, total_new, queries_used, 
-                                start_pages, q_idx
-                            )
-                            break
-                        
-                        full_name = repo_info['full_name']
-                        if full_name in processed:
-                            pbar.update(1)
-                            continue
-                        
-                        batch.append(repo_info)
-                        
-                        # Process batch when full
-                        if len(batch) >= self.config.BATCH_SIZE:
-                            self.checkpoint.save_batch_progress(
-                                batch, 
-                                {'query': query, 'page': current_page}
-                            )
-                            
-                            new_in_batch = await self._process_batch(batch, processed)
-                            total_new += new_in_batch
-                            pbar.update(len(batch))
-                            batch = []
-                            current_page += 1
-                            start_pages[query] = current_page
-                            queries_used[query] = True
-                            
-                            self._save_checkpoint(
-                                processed, total_new, queries_used, 
-                                start_pages, q_idx
-                            )
+                    batch.append(repo_info)
                     
-                    # Process remaining batch
-                    if batch and not self.shutdown_flag:
+                    # Process batch when full
+                    if len(batch) >= self.config.BATCH_SIZE:
+                        pbar.update(skipped)
+                        skipped = 0
                         self.checkpoint.save_batch_progress(
                             batch, 
                             {'query': query, 'page': current_page}
@@ -1156,6 +1905,8 @@ class LaTeXTemplateAgent:
                         new_in_batch = await self._process_batch(batch, processed)
                         total_new += new_in_batch
                         pbar.update(len(batch))
+                        batch = []
+                        current_page += 1
                         start_pages[query] = current_page
                         queries_used[query] = True
                         
@@ -1164,8 +1915,28 @@ class LaTeXTemplateAgent:
                             start_pages, q_idx
                         )
                 
-                pbar.close()
+                pbar.update(skipped)
                 
+                # Process remaining batch
+                if batch and not self.shutdown_flag:
+                    self.checkpoint.save_batch_progress(
+                        batch, 
+                        {'query': query, 'page': current_page}
+                    )
+                    
+                    new_in_batch = await self._process_batch(batch, processed)
+                    total_new += new_in_batch
+                    pbar.update(len(batch))
+                    start_pages[query] = current_page
+                    queries_used[query] = True
+                    
+                    self._save_checkpoint(
+                        processed, total_new, queries_used, 
+                        start_pages, q_idx
+                    )
+            
+            pbar.close()
+            
         except KeyboardInterrupt:
             logging.warning("Interrupted by user")
         except Exception as e:
@@ -1173,19 +1944,18 @@ class LaTeXTemplateAgent:
         finally:
             self._save_checkpoint(
                 processed, total_new, queries_used, 
-                start_pages, len(queries)
+                start_pages, len(queries), durable=True
             )
             self.checkpoint.cleanup()
             logging.info("Cleanup complete")
         
         # Export results
-        await self._export_results(total_new, top_n, export_csv, fresh_only)
+        total_db = await self._export_results(total_new, top_n, export_csv, fresh_only)
         
         # Download templates if requested
         if download:
             await self.download_templates(download_top, output_dir, clone_method)
         
-        total_db = await self.db.count_rows()
         logging.info(f"Complete: {total_new} new templates (Total: {total_db})")
         print(f"✅ Complete: {total_new} new templates added!")
     
@@ -1198,13 +1968,85 @@ class LaTeXTemplateAgent:
         signal.signal(signal.SIGINT, signal_handler)
         signal.signal(signal.SIGTERM, signal_handler)
     
-    def _save_checkpoint(self, processed, total_new, queries_used, start_pages, query_idx):
-        """Save checkpoint state"""
-        self.checkpoint.save(processed, total_new, queries_used, start_pages, query_idx)
+    def _save_checkpoint(self, processed, total_new, queries_used, start_pages, query_idx,
+                         durable: bool = False):
+        """Save checkpoint state (fsynced only when durable, i.e. on shutdown)"""
+        self.checkpoint.save(processed, total_new, queries_used, start_pages, query_idx, durable)
+    
+    @staticmethod
+    async def _prefetch(stream: AsyncIterator[Dict], size: int) -> AsyncIterator[Dict]:
+        """Drain stream from a background task into a bounded queue and yield from the queue"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=size)
+        done = object()
+        
+        async def produce():
+            cancelled = False
+            try:
+                async for item in stream:
+                    await queue.put(item)
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+            finally:
+                # Cancelled means the consumer has stopped reading: a put on a full queue would never return
+                if cancelled:
+                    await stream.aclose()  # Let the source run its own cleanup now
+                else:
+                    await queue.put(done)
+        
+        producer = asyncio.create_task(produce())
+        try:
+            while (item := await queue.get()) is not done:
+                yield item
+            await producer  # Re-raise anything the producer hit
+        finally:
+            producer.cancel()
+            # Wait for it to unwind; its error (if any) was raised above or is moot after an early exit
+            await asyncio.gather(producer, return_exceptions=True)
+    
+    async def _recategorize_fts(self, entries: List[Dict]):
+        """Re-categorize 'general' entries using the database full-text index"""
+        general = [entry for entry in entries if entry.get('category') == 'general']
+        matched = await self.db.categorize_batch_fts(
+            [entry['full_name'] for entry in general], self.config.HEURISTIC_RULES)
+        if not matched:
+            return
+        
+        updated = []
+        for entry in general:
+            cat = matched.get(entry['full_name'])
+            if cat:
+                entry.update(self.analyzer._heuristic_fields(cat))
+                updated.append(entry)
+        await self.db.update_categories(updated)
+    
+    def _get_parse_pool(self) -> ProcessPoolExecutor:
+        """Lazily start the process pool used for parse_tex on large sources"""
+        if self._parse_pool is None:
+            # spawn, not fork: forking a process with a running event loop, open sockets
+            # and sqlite handles can deadlock or corrupt them in the child
+            self._parse_pool = ProcessPoolExecutor(
+                max_workers=min(self.PARSE_POOL_WORKERS, os.cpu_count() or 1),
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._parse_pool
     
     async def _process_batch(self, batch: List[Dict], processed: Set[str]) -> int:
         """Process a batch of repositories"""
+        # A batch restored from progress may hold repos finished since; don't spend API calls on them
+        batch = [repo_info for repo_info in batch if repo_info['full_name'] not in processed]
+        
+        # Two GraphQL round trips cover the whole batch; per-repo REST calls are the fallback
+        tex_by_repo = await self.fetcher.fetch_tex_batch([repo_info['full_name'] for repo_info in batch])
+        
         async def fetch_tex_content(repo_info: Dict) -> Dict:
+            if tex_by_repo is not None:
+                text = tex_by_repo.get(repo_info['full_name'], '')
+                if text is not None:
+                    if text:
+                        repo_info['main_tex'] = text
+                    return repo_info
+            
             async with self.semaphore:
                 try:
                     contents_url = f"https://api.github.com/repos/{repo_info['full_name']}/contents"
@@ -1212,14 +2054,15 @@ class LaTeXTemplateAgent:
                     
                     tex_files = [
                         c for c in contents 
-                        if c.get('name', '').lower().endswith('.tex')
+                        if _TEX_RE.search(c.get('name') or '')
                     ][:1]
                     
-                    if tex_files:
+                    # Oversized sources are generated output; skip rather than pull and decode them
+                    if tex_files and (tex_files[0].get('size') or 0) <= self.fetcher.MAX_FILE_BYTES:
                         session = await self.fetcher.get_session()
                         async with session.get(
                             tex_files[0]['download_url'],
-                            timeout=aiohttp.ClientTimeout(total=30)
+                            timeout=self.fetcher.timeout
                         ) as resp:
                             if resp.status == 200:
                                 repo_info['main_tex'] = await resp.text()
@@ -1241,12 +2084,29 @@ class LaTeXTemplateAgent:
                 continue
             valid_entries.append(entry)
         
-        # Parse LaTeX content
+        # Parse LaTeX content: parse_tex is pure-regex CPU work, so only large sources go to
+        # worker processes; the rest are quick enough to parse inline
+        large_tex = []
         for entry in valid_entries:
-            if entry.get('main_tex'):
-                parsed = self.analyzer.parse_tex(entry['main_tex'])
-                entry.update(parsed)
+            tex = entry.get('main_tex')
+            if not tex:
+                continue
+            if len(tex) >= self.PARSE_POOL_MIN_CHARS:
+                large_tex.append(entry)
             else:
+                entry.update(self.analyzer.parse_tex(tex))
+        if large_tex:
+            loop = asyncio.get_running_loop()
+            pool = self._get_parse_pool()
+            parsed_all = await asyncio.gather(*(
+                loop.run_in_executor(pool, _parse_tex_in_worker, entry['main_tex'])
+                for entry in large_tex
+            ))
+            for entry, parsed in zip(large_tex, parsed_all):
+                entry.update(parsed)
+        
+        for entry in valid_entries:
+            if not entry.get('main_tex'):
                 entry['processing_errors'] = "; No tex file found"
                 entry['processing_status'] = 'error_no_tex'
         
@@ -1268,6 +2128,10 @@ class LaTeXTemplateAgent:
         if valid_entries:
             await self.db.batch_insert_or_update(valid_entries)
         
+        # Heuristics only see the preview; give uncategorized rows a second pass over the full stored tex
+        if not self.analyzer.use_ai:
+            await self._recategorize_fts(valid_entries)
+        
         # Update processed set
         new_count = 0
         for entry in valid_entries:
@@ -1308,14 +2172,38 @@ class LaTeXTemplateAgent:
         pbar = tqdm(
             total=len(top_repos), 
             desc="Downloading Templates", 
-            unit="repo"
+            unit="repo",
+            mininterval=0.5
         )
         
-        for repo in top_repos:
-            if repo.get('processing_status') == 'downloaded':
-                pbar.update(1)
-                continue
-            
+        # Skip repos already downloaded (per DB status or files on disk) before any API call
+        pending = [repo for repo in top_repos if not self._already_downloaded(repo, output_path)]
+        pbar.update(len(top_repos) - len(pending))
+        
+        # Keep up to MAX_CONCURRENT downloads in flight; the bar advances as each one finishes
+        sem = asyncio.Semaphore(self.config.MAX_CONCURRENT)
+        tasks = [self._download_one(repo, output_path, method, sem) for repo in pending]
+        for fut in asyncio.as_completed(tasks):
+            if await fut:
+                download_success += 1
+            pbar.update(1)
+        
+        pbar.close()
+        logging.info(f"Downloaded {download_success}/{len(top_repos)} repositories")
+        print(f"📦 Templates downloaded to {output_path}")
+    
+    def _already_downloaded(self, repo: Dict, output_path: Path) -> bool:
+        """True if the repo is marked downloaded or its local directory already has files"""
+        # query_top reports the status as 'status'; raw entries carry 'processing_status'
+        if 'downloaded' in (repo.get('status'), repo.get('processing_status')):
+            return True
+        local_dir = self.fetcher.local_repo_dir(repo, output_path)
+        return local_dir.is_dir() and any(local_dir.iterdir())
+    
+    async def _download_one(self, repo: Dict, output_path: Path, method: str,
+                            sem: asyncio.Semaphore) -> bool:
+        """Download a single repository and record it; True on success"""
+        async with sem:
             try:
                 success = await self.fetcher.download_repo(repo, output_path, method)
                 if success:
@@ -1324,30 +2212,36 @@ class LaTeXTemplateAgent:
                         'processing_status': 'downloaded',
                         'local_path': repo.get('local_path', '')
                     }])
-                    download_success += 1
-                pbar.update(1)
+                return success
             except Exception as e:
                 logging.error(f"Download error for {repo['full_name']}: {e}")
-                pbar.update(1)
-        
-        pbar.close()
-        logging.info(f"Downloaded {download_success}/{len(top_repos)} repositories")
-        print(f"📦 Templates downloaded to {output_path}")
+                return False
     
     async def _export_results(self, total_new: int, top_n: int, export_csv: bool, 
-                             fresh_only: bool):
-        """Export results in various formats"""
+                             fresh_only: bool) -> int:
+        """Export results in various formats; returns the DB row count"""
         top_repos = await self.db.query_top(top_n=top_n, fresh_only=fresh_only, fresh_days=self.config.FRESH_DAYS)
         
-        # JSON export
+        total_db = await self.db.count_rows()
         output = {
             'total_new': total_new,
-            'total_db': await self.db.count_rows(),
+            'total_db': total_db,
             'top_templates': top_repos
         }
         
-        with open('templates_report.json', 'w') as f:
-            json.dump(output, f, indent=2)
+        # File writes happen in a worker thread to keep the event loop free
+        await asyncio.to_thread(self._write_reports, output, top_repos, export_csv)
+        return total_db
+    
+    @staticmethod
+    def _write_reports(output: Dict, top_repos: List[Dict], export_csv: bool):
+        """Write the JSON, CSV and Markdown reports"""
+        # JSON export
+        with open('templates_report.json', 'wb') as f:
+            if HAS_ORJSON:
+                f.write(orjson.dumps(output, option=orjson.OPT_INDENT_2))
+            else:
+                f.write(json.dumps(output, indent=2).encode())
         
         # CSV export
         if export_csv:
@@ -1371,8 +2265,8 @@ class LaTeXTemplateAgent:
         # Markdown export
         with open('templates_report.md', 'w') as f:
             f.write(f"# LaTeX Template Report\n\n")
-            f.write(f"- **New Templates**: {total_new}\n")
-            f.write(f"- **Total in DB**: {await self.db.count_rows()}\n\n")
+            f.write(f"- **New Templates**: {output['total_new']}\n")
+            f.write(f"- **Total in DB**: {output['total_db']}\n\n")
             f.write("## Top Templates\n")
             
             for repo in top_repos[:10]:
@@ -1386,6 +2280,9 @@ class LaTeXTemplateAgent:
         """Cleanup resources"""
         await self.fetcher.close()
         await self.db.close()
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown(cancel_futures=True)
+            self._parse_pool = None
 
 # ==============================================================================
 # Main Entry Point
@@ -1393,6 +2290,10 @@ class LaTeXTemplateAgent:
 
 def main():
     """Main entry point"""
+    if HAS_UVLOOP:
+        # libuv loop: cheaper callbacks across thousands of short HTTP requests
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    
     parser = argparse.ArgumentParser(
         description="LaTeX Template Scraper v1.0",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -1423,7 +2324,7 @@ Examples:
     parser.add_argument('--download', action='store_true', help="Download templates locally")
     parser.add_argument('--download-top', type=int, default=20, help="Top templates per category to download")
     parser.add_argument('--output-dir', help="Download directory")
-    parser.add_argument('--clone-method', choices=['git', 'raw'], default='git', help="Download method")
+    parser.add_argument('--clone-method', choices=['git', 'raw', 'tarball'], default='git', help="Download method")
     
     # Database options
     parser.add_argument('--db', help="Database file path")
@@ -14,6 +14,9 @@ import os
 import json
 import sqlite3
 import logging
+import logging.handlers
+import queue
+import atexit
 import asyncio
 import aiohttp
 import signal
@@ -22,24 +25,24 @@ import time
 import re
 import argparse
 import csv
+import hashlib
+import importlib.util
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional, AsyncIterator, Set, Union
+from typing import List, Dict, Any, Optional, AsyncIterator, Set, Union, ClassVar, Tuple, Mapping, FrozenSet
+from types import MappingProxyType
 from pathlib import Path
 from dataclasses import dataclass, field
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from tenacity import (retry, stop_after_attempt, wait_exponential, wait_exponential_jitter, retry_if_exception_type,
+                      AsyncRetrying, RetryError)
 from tqdm.asyncio import tqdm
-import requests
-from itertools import cycle
-import base64 # For README decoding
+from collections import OrderedDict
+import binascii # For README decoding
 
-# For HTML parsing (optional)
-try:
-    from bs4 import BeautifulSoup
-    HAS_BS4 = True
-except ImportError:
-    HAS_BS4 = False
+# For HTML parsing (optional) - only checked for here, imported in extract_links
+HAS_BS4 = importlib.util.find_spec('bs4') is not None
+if not HAS_BS4:
     logging.warning("beautifulsoup4 not installed - HTML link extraction disabled (pip install beautifulsoup4)")
 
 # Async database support
@@ -57,26 +60,73 @@ try:
 except ImportError:
     HAS_GIT = False
 
+# Optional persistent completion cache
+try:
+    import diskcache
+    HAS_DISKCACHE = True
+except ImportError:
+    HAS_DISKCACHE = False
+
+# Optional fast JSON
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+# Optional single-pass keyword matching
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+
 # Load env
 load_dotenv()
 
+# JSON for DB columns, API payloads and checkpoints: orjson when installed, stdlib otherwise
+if HAS_ORJSON:
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+else:
+    _json_loads = json.loads
+    _json_dumps = json.dumps
+
+# Most list/dict DB columns are empty; these skip the encoder and decoder for them
+_EMPTY_LIST_JSON = '[]'
+_EMPTY_DICT_JSON = '{}'
+
+
+def _json_column(raw, empty=list):
+    """Decode a JSON DB column; NULL or an empty sentinel gives a fresh empty() container"""
+    if not raw or raw == _EMPTY_LIST_JSON or raw == _EMPTY_DICT_JSON:
+        return empty()
+    return _json_loads(raw)
+
+
+def _numbered_env_values(prefix: str) -> Tuple[str, ...]:
+    """Non-empty values of PREFIX, PREFIX1, PREFIX2, ... in numeric order (KEY2 before KEY10)"""
+    found = []
+    for name, value in os.environ.items():
+        match = re.fullmatch(rf'{re.escape(prefix)}(\d*)', name)
+        if match and value:
+            found.append((int(match.group(1) or 0), value))
+    return tuple(value for _, value in sorted(found))
+
 # ==============================================================================
 # Configuration
 # ==============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class Config:
     """Configuration class for the Theme Scraper"""
 
     # API Configuration
     GITHUB_TOKEN: str = field(default_factory=lambda: os.getenv('GITHUB_TOKEN', ''))
-    MINIMAX_API_KEYS: List[str] = field(default_factory=lambda: [
-        os.getenv('MINIMAX_API_KEY1', ''),
-        os.getenv('MINIMAX_API_KEY2', ''),
-        os.getenv('MINIMAX_API_KEY3', ''),
-        os.getenv('MINIMAX_API_KEY4', ''),
-        os.getenv('MINIMAX_API_KEY5', ''),
-    ])
+    # Every non-empty MINIMAX_API_KEY<n> variable (KEY1, KEY2, ... no fixed ceiling), in numeric order
+    MINIMAX_API_KEYS: Tuple[str, ...] = field(default_factory=lambda: _numbered_env_values('MINIMAX_API_KEY'))
 
     # Default model (M1 for agentic reasoning, VL-01 for vision)
     MINIMAX_MODEL: str = "MiniMax-M1"
@@ -95,11 +145,12 @@ class Config:
     # Vision Configuration
     VISION_ENABLED: bool = False
     MAX_IMAGES_PER_REPO: int = 2
-    IMAGE_EXTS: List[str] = field(default_factory=lambda: ['.png', '.jpg', '.jpeg', '.gif', '.svg'])
-    IMAGE_PRIORITY: List[str] = field(default_factory=lambda: [
+    IMAGE_EXTS: ClassVar[FrozenSet[str]] = frozenset({'.png', '.jpg', '.jpeg', '.gif', '.svg'})
+    # Filename -> rank (lower sorts first); hashed lookups since every image of every repo is scored
+    IMAGE_PRIORITY: ClassVar[Mapping[str, int]] = MappingProxyType({name: i for i, name in enumerate((
         'screenshot.png', 'demo.jpg', 'preview.gif', 'ui-theme.svg', 'diagram.png',
         'screenshot.jpg', 'screenshot.jpeg', 'screenshot.gif', 'demo.png', 'preview.png'
-    ])
+    ))})
 
     # Agentic Configuration
     AGENTIC_MODE: bool = False
@@ -112,8 +163,8 @@ class Config:
     TEMP_BATCH_FILE: str = 'temp_batch.json'
     DOWNLOAD_DIR: str = 'themes'
 
-    # Default Queries (original + UI/Mods)
-    DEFAULT_QUERIES: List[str] = field(default_factory=lambda: [
+    # Default Queries (original + UI/Mods) - shared, immutable
+    DEFAULT_QUERIES: ClassVar[Tuple[str, ...]] = (
         # JSON Resume, Mermaid, etc. (your originals)
         'jsonresume-theme stars:>5', 'topic:jsonresume-theme stars:>3', '"jsonresume theme" in:description stars:>2', 'jsonresume theme in:name',
         'mermaid theme stars:>10', 'mermaid diagram template stars:>5', 'topic:mermaid-diagrams', 'mermaid flowchart example',
@@ -128,63 +179,62 @@ class Config:
         'vue ui component stars:>10', 'react ui kit modular stars:>5', 'svelte theme mods plugin stars:>5',
         'awesome vue', 'awesome react ui', 'ui component library extensible stars:>5',
         'modular theme css js stars:>10', 'tailwind ui mods', 'bootstrap theme plugins', 'material ui react mods',
-    ])
+    )
 
     # Categories (original + new)
-    CATEGORIES: List[str] = field(default_factory=lambda: [
+    CATEGORIES: ClassVar[Tuple[str, ...]] = (
         'jsonresume_theme', 'mermaid_theme', 'chartjs_plugin', 'chartjs_example', 'react_flow_example',
         'd3_visualization', 'd3_chart_library', 'recharts_example', 'document_template', 'infographic_template',
         'portfolio_template', 'general_visualization', 'other',
         # NEW:
         'ui_component', 'modular_theme', 'ui_mods', 'awesome_list',
-    ])
+    )
 
     # Tech Keywords (original + new)
-    TECH_KEYWORDS: Dict[str, List[str]] = field(default_factory=lambda: {
-        'jsonresume': ['jsonresume', 'resume.json', 'json resume', 'resume schema'],
-        'mermaid': ['mermaid', 'mermaid.js', 'mermaidjs', 'flowchart', 'sequence diagram'],
-        'chartjs': ['chart.js', 'chartjs', 'chartjs-plugin', 'chartjs-chart'],
-        'react_flow': ['react-flow', 'reactflow', 'xyflow', 'node-based'],
-        'd3': ['d3.js', 'd3-', 'd3 v', 'data-driven'],
-        'recharts': ['recharts', 'react chart'],
-        'typescript': ['typescript', '.ts', '.tsx'],
-        'tailwind': ['tailwind', 'tailwindcss'],
-        'bootstrap': ['bootstrap', 'bs-'],
-        'sass': ['sass', 'scss', '.scss'],
-        'less': ['less', '.less'],
-        'react': ['react', 'jsx', '.jsx'],
-        'vue': ['vue', 'vue.js'],
-        'svelte': ['svelte', 'svelte.js'],
+    TECH_KEYWORDS: ClassVar[Mapping[str, Tuple[str, ...]]] = MappingProxyType({
+        'jsonresume': ('jsonresume', 'resume.json', 'json resume', 'resume schema'),
+        'mermaid': ('mermaid', 'mermaid.js', 'mermaidjs', 'flowchart', 'sequence diagram'),
+        'chartjs': ('chart.js', 'chartjs', 'chartjs-plugin', 'chartjs-chart'),
+        'react_flow': ('react-flow', 'reactflow', 'xyflow', 'node-based'),
+        'd3': ('d3.js', 'd3-', 'd3 v', 'data-driven'),
+        'recharts': ('recharts', 'react chart'),
+        'typescript': ('typescript', '.ts', '.tsx'),
+        'tailwind': ('tailwind', 'tailwindcss'),
+        'bootstrap': ('bootstrap', 'bs-'),
+        'sass': ('sass', 'scss', '.scss'),
+        'less': ('less', '.less'),
+        'react': ('react', 'jsx', '.jsx'),
+        'vue': ('vue', 'vue.js'),
+        'svelte': ('svelte', 'svelte.js'),
         # NEW: UI/Mods
-        'ui_component': ['ui-kit', 'component', 'button', 'form', 'vue-component', 'react-component', 'svelte-component'],
-        'modular_theme': ['mod', 'plugin', 'extensible', 'configurable', 'slots', 'props', 'module'],
+        'ui_component': ('ui-kit', 'component', 'button', 'form', 'vue-component', 'react-component', 'svelte-component'),
+        'modular_theme': ('mod', 'plugin', 'extensible', 'configurable', 'slots', 'props', 'module'),
     })
 
     # Heuristic Rules (original + new)
-    HEURISTIC_RULES: Dict[str, List[str]] = field(default_factory=lambda: {
-        'jsonresume_theme': ['jsonresume-theme', 'resume.json', 'json resume theme'],
-        'mermaid_theme': ['mermaid theme', 'mermaid config', 'mermaid.config'],
-        'chartjs_plugin': ['chartjs-plugin', 'chart.js plugin'],
-        'chartjs_example': ['chart.js example', 'chartjs demo', 'chartjs sample'],
-        'react_flow_example': ['react-flow', 'reactflow', 'react flow example'],
-        'd3_visualization': ['d3 visualization', 'd3.js viz', 'd3 chart', 'd3 graph'],
-        'd3_chart_library': ['billboard.js', 'britecharts', 'plottable', 'dc.js'],
-        'recharts_example': ['recharts', 'recharts example'],
-        'document_template': ['resume template', 'cv template', 'document template'],
-        'infographic_template': ['infographic', 'data visualization template'],
-        'portfolio_template': ['portfolio', 'personal website template'],
+    HEURISTIC_RULES: ClassVar[Mapping[str, Tuple[str, ...]]] = MappingProxyType({
+        'jsonresume_theme': ('jsonresume-theme', 'resume.json', 'json resume theme'),
+        'mermaid_theme': ('mermaid theme', 'mermaid config', 'mermaid.config'),
+        'chartjs_plugin': ('chartjs-plugin', 'chart.js plugin'),
+        'chartjs_example': ('chart.js example', 'chartjs demo', 'chartjs sample'),
+        'react_flow_example': ('react-flow', 'reactflow', 'react flow example'),
+        'd3_visualization': ('d3 visualization', 'd3.js viz', 'd3 chart', 'd3 graph'),
+        'd3_chart_library': ('billboard.js', 'britecharts', 'plottable', 'dc.js'),
+        'recharts_example': ('recharts', 'recharts example'),
+        'document_template': ('resume template', 'cv template', 'document template'),
+        'infographic_template': ('infographic', 'data visualization template'),
+        'portfolio_template': ('portfolio', 'personal website template'),
         # NEW:
-        'ui_component': ['ui component', 'ui kit', 'vue ui', 'react ui', 'svelte ui', 'component library'],
-        'modular_theme': ['modular theme', 'theme mod', 'plugin system', 'extensible ui', 'configurable mod'],
+        'ui_component': ('ui component', 'ui kit', 'vue ui', 'react ui', 'svelte ui', 'component library'),
+        'modular_theme': ('modular theme', 'theme mod', 'plugin system', 'extensible ui', 'configurable mod'),
     })
 
     def validate(self):
         if not self.GITHUB_TOKEN:
             logging.warning("No GitHub token - rate limits restrictive")
-        valid_keys = [k for k in self.MINIMAX_API_KEYS if k]
-        if self.USE_AI and not valid_keys:
-            logging.warning("AI requested but no MiniMax keys")
-        elif valid_keys:
+        # Keys are filtered non-empty when loaded, so the tuple itself is the valid set
+        valid_keys = self.MINIMAX_API_KEYS
+        if valid_keys:
             logging.info(f"Loaded {len(valid_keys)} MiniMax API keys")
         if self.SCRAPE_HTML and not HAS_BS4:
             logging.warning("HTML scraping enabled but no BeautifulSoup - install it")
@@ -194,7 +244,7 @@ class Config:
 
     @property
     def USE_AI(self) -> bool:
-        return any(self.MINIMAX_API_KEYS)
+        return bool(self.MINIMAX_API_KEYS)
 
 # ==============================================================================
 # Custom Exceptions (unchanged)
@@ -212,17 +262,33 @@ class RateLimitError(GitHubAPIError):
 class DatabaseError(ScraperError):
     pass
 
+class MiniMaxRetryableError(ScraperError):
+    """429/5xx/bad key or a base_resp error from MiniMax - back off and try the next key"""
+    pass
+
 # ==============================================================================
 # Logging (unchanged)
 # ==============================================================================
 
 def setup_logging(verbose: bool = False, log_file: str = 'theme_scraper.log'):
     level = logging.DEBUG if verbose else logging.INFO
-    logging.basicConfig(
-        level=level,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[logging.FileHandler(log_file), logging.StreamHandler()]
-    )
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handlers = [logging.FileHandler(log_file), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    # Callers (the event loop included) only enqueue records; a listener thread does the file/console writes
+    log_queue = queue.Queue(-1)
+    root = logging.getLogger()
+    root.setLevel(level)
+    # An import-time logging.warning() (e.g. the bs4 notice) runs basicConfig; drop its
+    # stderr handler so records aren't printed twice
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # Drains what's queued before exit
     return logging.getLogger(__name__)
 
 # ==============================================================================
@@ -230,99 +296,171 @@ def setup_logging(verbose: bool = False, log_file: str = 'theme_scraper.log'):
 # ==============================================================================
 
 class RateLimiter:
+    """
+    Local token bucket fed by the X-RateLimit-* headers GitHub already returns on every
+    response, so throttling costs no extra request (no /rate_limit polling).
+    """
+    LOW_WATER = 50  # Pause for the reset once this few calls are left
+    RESET_SLACK = 5  # Seconds past the advertised reset before resuming
+    GRAPHQL_POINTS = 5000  # Hourly GraphQL budget, tracked apart from the core REST quota
+
     def __init__(self, token: Optional[str] = None):
         self.token = token
-        self._session = None
-        self.remaining = 5000 if token else 60
+        self.limit = 5000 if token else 60
+        self.remaining = self.limit
         self.reset_timestamp = int(time.time()) + 3600
-        self.poll_interval = 5
-        self.call_count = 0
+        self.graphql_remaining = self.GRAPHQL_POINTS
+        self.graphql_reset_timestamp = self.reset_timestamp
         self.lock = asyncio.Lock()
 
-    async def check_and_wait(self):
+    async def check_and_wait(self, graphql: bool = False):
+        """Spend one call from the core bucket (or the GraphQL one), pausing for its reset when low"""
         async with self.lock:
-            self.call_count += 1
-            if self.call_count % self.poll_interval != 0 or self.remaining > 100:
+            if graphql:
+                if self.graphql_remaining < self.LOW_WATER:
+                    await self._wait_for_reset(self.graphql_reset_timestamp, self.graphql_remaining)
+                    self.graphql_remaining = self.GRAPHQL_POINTS
+                self.graphql_remaining -= 1
                 return
-            if self._session is None:
-                self._session = aiohttp.ClientSession()
-            headers = {'Authorization': f'token {self.token}'} if self.token else {}
-            try:
-                timeout = aiohttp.ClientTimeout(total=5)
-                async with self._session.get('https://api.github.com/rate_limit', headers=headers, timeout=timeout) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        core = data['resources']['core']
-                        self.remaining = core['remaining']
-                        self.reset_timestamp = core['reset']
-                        if self.remaining < 50:
-                            wait_sec = max(3600 - (int(time.time()) - self.reset_timestamp) + 60, 300)
-                            logging.warning(f"Rate limit low ({self.remaining}), pausing {wait_sec}s")
-                            await asyncio.sleep(wait_sec)
-                            await self.check_and_wait()
-            except Exception as e:
-                logging.debug(f"Rate check error: {e}")
-            finally:
-                if self._session:
-                    await self._session.close()
-                    self._session = None
+            if self.remaining < self.LOW_WATER:
+                await self._wait_for_reset(self.reset_timestamp, self.remaining)
+                self.remaining = self.limit  # Window rolled over; headers correct this on the next reply
+            # Spend a token up front so concurrent callers see the drain before their replies land
+            self.remaining -= 1
+
+    async def _wait_for_reset(self, reset_timestamp: int, remaining: int):
+        wait_sec = reset_timestamp - time.time() + self.RESET_SLACK
+        if wait_sec > 0:
+            logging.warning(f"Rate limit low ({remaining}), pausing {wait_sec:.0f}s")
+            await asyncio.sleep(wait_sec)
+
+    def update_from_headers(self, headers: Mapping[str, str]):
+        """Sync the bucket with the X-RateLimit-* headers of a REST response"""
+        # Search replies report their own 30/min bucket; letting them in would trip LOW_WATER
+        if headers.get('X-RateLimit-Resource', 'core') != 'core':
+            return
+        remaining = headers.get('X-RateLimit-Remaining')
+        if remaining is None:
+            return
+        self.remaining = int(remaining)
+        self.limit = int(headers.get('X-RateLimit-Limit', self.limit))
+        self.reset_timestamp = int(headers.get('X-RateLimit-Reset', self.reset_timestamp))
+
+    def update_from_graphql(self, rate_limit: Dict):
+        """Take the GraphQL points budget from the rateLimit block every GraphQL response carries"""
+        if not rate_limit:
+            return
+        self.graphql_remaining = rate_limit.get('remaining', self.graphql_remaining)
+        reset_at = rate_limit.get('resetAt')
+        if reset_at:
+            self.graphql_reset_timestamp = int(datetime.fromisoformat(reset_at.replace('Z', '+00:00')).timestamp())
 
 # ==============================================================================
 # MiniMax Client (MODIFIED: Aligned with docs, M1 default, error handling, top_p, vision support)
 # ==============================================================================
 
 class MiniMaxClient:
-    def __init__(self, api_keys: List[str], model: str = "MiniMax-M1"):
+    CACHE_SIZE = 2048  # Completions kept in memory
+    CACHE_TTL = 7 * 86400  # Seconds a completion stays in the on-disk cache
+    CACHE_MAX_TEMPERATURE = 0.3  # Hotter calls want fresh samples, so aren't cached by default
+    KEY_COOLDOWN = 30  # Seconds a rate-limited key sits out of the rotation
+
+    def __init__(self, api_keys: List[str], model: str = "MiniMax-M1", max_connections: int = 20,
+                 cache_dir: Optional[str] = '.minimax_cache'):
         self.api_keys = [key for key in api_keys if key]
         if not self.api_keys:
             raise ValueError("No valid MiniMax API keys")
-        self.key_cycle = cycle(self.api_keys)
-        self.current_key = next(self.key_cycle)
+        self._key_idx = 0  # Rotation position; coroutines share one loop thread, so no lock is needed
         self.base_url = "https://api.minimax.io/v1/text/chatcompletion_v2"
         self.model = model # e.g., "MiniMax-M1" for reasoning, "MiniMax-VL-01" for vision
+        # One keep-alive session for every call, so only the first request pays for TCP+TLS setup
+        self._session: Optional[aiohttp.ClientSession] = None
+        self.max_connections = max_connections
+        # Every call takes the next key, so up to one request per key runs at once
+        self._sem = asyncio.Semaphore(len(self.api_keys))
+        self._key_ready_at: Dict[str, float] = {}  # Rate-limited key -> when it may be used again
+        # Prompt hash -> completion; the disk tier (diskcache, if installed) survives re-runs
+        self._memo: OrderedDict = OrderedDict()
+        self._disk_cache = diskcache.Cache(cache_dir) if HAS_DISKCACHE and cache_dir else None
         logging.info(f"MiniMax client init with {len(self.api_keys)} keys, model: {model}")
 
     def _get_next_key(self):
-        self.current_key = next(self.key_cycle)
-        return self.current_key
+        """Next key in the rotation, skipping keys still cooling off from a rate limit"""
+        keys, ready_at = self.api_keys, self._key_ready_at
+        now = time.monotonic()
+        for _ in range(len(keys)):
+            key = keys[self._key_idx % len(keys)]
+            self._key_idx += 1
+            if ready_at.get(key, 0) <= now:
+                return key
+        # Every key is cooling; take the one that frees up first
+        return min(keys, key=lambda k: ready_at.get(k, 0))
+
+    def _cool_down(self, key: str):
+        self._key_ready_at[key] = time.monotonic() + self.KEY_COOLDOWN
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=60),
+                                                  json_serialize=_json_dumps)
+        return self._session
 
-    def chat_completion(self, messages: List[Dict], max_tokens: int = 4096, temperature: float = 0.8,
-                        top_p: float = 0.95, stream: bool = False, multimodal: bool = False) -> Dict:
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        if self._disk_cache is not None:
+            self._disk_cache.close()
+
+    def _cache_key(self, messages: List[Dict], max_tokens: int, temperature: float, top_p: float) -> str:
+        raw = json.dumps([self.model, messages, max_tokens, round(temperature, 2), round(top_p, 2)], sort_keys=True)
+        return hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()
+
+    async def chat_completion(self, messages: List[Dict], max_tokens: int = 4096, temperature: float = 0.8,
+                              top_p: float = 0.95, stream: bool = False, multimodal: bool = False,
+                              cache: Optional[bool] = None) -> Dict:
         """
-        Call MiniMax chatcompletion_v2 (aligned with docs).
-        Uses M1 defaults: max_tokens=8192, temp=1.0 (overridden here for control).
-        Handles base_resp errors, sensitive content, key rotation.
-        Supports multimodal content when multimodal=True.
+        Cached front for _request_completion: identical prompts are answered from memory/disk.
+        cache=None caches only near-deterministic calls (temperature <= CACHE_MAX_TEMPERATURE).
         """
-        headers = {
-            "Authorization": f"Bearer {self.current_key}",
-            "Content-Type": "application/json"
-        }
+        if cache is None:
+            cache = temperature <= self.CACHE_MAX_TEMPERATURE
+        if not cache or stream:
+            return await self._request_completion(messages, max_tokens, temperature, top_p, stream, multimodal)
+
+        key = self._cache_key(messages, max_tokens, temperature, top_p)
+        result = self._memo.get(key)
+        if result is None and self._disk_cache is not None:
+            result = self._disk_cache.get(key)
+        if result is not None:
+            logging.debug(f"MiniMax cache hit {key}")
+        else:
+            result = await self._request_completion(messages, max_tokens, temperature, top_p, stream, multimodal)
+            if self._disk_cache is not None:
+                self._disk_cache.set(key, result, expire=self.CACHE_TTL)
+
+        self._memo[key] = result
+        self._memo.move_to_end(key)
+        if len(self._memo) > self.CACHE_SIZE:
+            self._memo.popitem(last=False)
+        return result
 
-        # Format messages per docs: role, content (str or array), name (role-based, optional but used for clarity)
-        formatted_messages = []
-        for msg in messages:
-            formatted_msg = {
+    def _build_payload(self, messages: List[Dict], max_tokens: int, temperature: float, top_p: float,
+                       stream: bool, multimodal: bool) -> Dict:
+        """Request body for chatcompletion_v2"""
+        # Role + content only; "name" is optional and costs prompt tokens, so it's kept only if the caller set it.
+        # Content stays an array for multimodal ([{"type": "text", ...}, {"type": "image_url", ...}]), else a string.
+        keep = (list, str) if multimodal else str
+        formatted_messages = [
+            {
+                **({"name": msg["name"]} if "name" in msg else {}),
                 "role": msg["role"],
+                "content": content if isinstance(content := msg.get("content", ""), keep) else str(content),
             }
-            
-            # Handle content as either string or array (for multimodal)
-            content = msg.get("content", "")
-            if multimodal and isinstance(content, list):
-                formatted_msg["content"] = content  # Array: [{"type": "text", ...}, {"type": "image_url", ...}]
-            else:
-                formatted_msg["content"] = str(content)  # Ensure string otherwise
-
-            if msg["role"] == "system":
-                formatted_msg["name"] = "MiniMax AI"
-            elif msg["role"] == "user":
-                formatted_msg["name"] = "user"
-            elif msg["role"] == "assistant":
-                formatted_msg["name"] = "MiniMax AI"
-            
-            formatted_messages.append(formatted_msg)
+            for msg in messages
+        ]
 
-        payload = {
+        return {
             "model": self.model,
             "messages": formatted_messages,
             "max_tokens": max_tokens,
@@ -331,104 +469,191 @@ class MiniMaxClient:
             "stream": stream
         }
 
-        max_retries = len(self.api_keys)
-        last_error = None
-
-        for attempt in range(max_retries):
-            try:
-                response = requests.post(self.base_url, headers=headers, json=payload, timeout=60)
-
-                if response.status_code == 200:
-                    result = response.json()
-
-                    # Check base_resp per docs
-                    base_resp = result.get('base_resp', {})
-                    if base_resp.get('status_code', 0) != 0:
-                        error_msg = base_resp.get('status_msg', 'Unknown error')
-                        last_error = f"MiniMax error {base_resp['status_code']}: {error_msg}"
-                        logging.error(last_error)
-                        if base_resp['status_code'] == 1002:  # Rate limit
-                            time.sleep(2)
-                        if base_resp['status_code'] == 1008:  # Insufficient balance
-                            raise ValueError("Insufficient MiniMax balance - check account")
-                        continue
-
-                    # Log sensitive content if any
-                    if result.get('input_sensitive', False):
-                        logging.warning(f"Input sensitive (type: {result.get('input_sensitive_type')})")
-                    if result.get('output_sensitive', False):
-                        logging.warning(f"Output sensitive (type: {result.get('output_sensitive_type')})")
-
-                    # Extract content from choices[0]
-                    if 'choices' in result and len(result['choices']) > 0:
-                        choice = result['choices'][0]
-                        if 'message' in choice:
-                            content = choice['message'].get('content', '')
-                        elif stream and 'delta' in choice:
-                            content = choice['delta'].get('content', '')
-                        else:
-                            content = ''
-
-                    # Log usage
-                    usage = result.get('usage', {})
-                    logging.info(f"Tokens used: {usage.get('total_tokens', 0)} (prompt: {usage.get('prompt_tokens', 0)}, completion: {usage.get('completion_tokens', 0)})")
-
-                    return {
-                        'choices': [{'message': {'content': content}}],
-                        'usage': usage  # Expose for monitoring
-                    }
-
-                    return result
-
-                elif response.status_code == 401:
-                    logging.warning("Invalid key, rotating")
-                    self._get_next_key()
-                    headers["Authorization"] = f"Bearer {self.current_key}"
-                    continue
-                elif response.status_code == 429:
-                    logging.warning("Rate limited, rotating + wait")
-                    self._get_next_key()
-                    headers["Authorization"] = f"Bearer {self.current_key}"
-                    time.sleep(2)
-                    continue
-                else:
-                    last_error = f"HTTP {response.status_code}: {response.text}"
-                    logging.error(last_error)
-                    if attempt < max_retries - 1:
-                        self._get_next_key()
-                        headers["Authorization"] = f"Bearer {self.current_key}"
-                        time.sleep(1)
-                        continue
-
-            except requests.exceptions.Timeout:
-                last_error = "Timeout"
-                logging.error(f"Timeout, attempt {attempt+1}")
-                if attempt < max_retries - 1:
-                    self._get_next_key()
-                    time.sleep(2)
-                    continue
-            except Exception as e:
-                last_error = str(e)
-                if attempt < max_retries - 1:
-                    self._get_next_key()
-                    time.sleep(1)
+    async def stream_completion(self, messages: List[Dict], max_tokens: int = 4096, temperature: float = 0.8,
+                                top_p: float = 0.95, multimodal: bool = False) -> AsyncIterator[str]:
+        """
+        Yield completion text as MiniMax streams it (SSE), instead of buffering the whole response.
+        Single attempt on the next key in the rotation; a 429 benches that key before raising.
+        """
+        key = self._get_next_key()
+        headers = {
+            "Authorization": f"Bearer {key}",
+            "Content-Type": "application/json"
+        }
+        payload = self._build_payload(messages, max_tokens, temperature, top_p, True, multimodal)
+        session = await self.get_session()
+        async with self._sem, session.post(self.base_url, headers=headers, json=payload) as response:
+            if response.status != 200:
+                if response.status == 429:
+                    self._cool_down(key)
+                raise Exception(f"MiniMax stream HTTP {response.status}: {await response.text()}")
+            async for raw_line in response.content:
+                line = raw_line.strip()
+                if not line.startswith(b'data:'):
                     continue
+                data = line[5:].strip()
+                if data == b'[DONE]':
+                    break
+                chunk = _json_loads(data)
+                base_resp = chunk.get('base_resp') or {}
+                if base_resp.get('status_code', 0) != 0:
+                    raise Exception(f"MiniMax error {base_resp['status_code']}: {base_resp.get('status_msg', 'Unknown error')}")
+                for choice in chunk.get('choices') or []:
+                    # The closing chunk repeats the full text under 'message'; only deltas are new
+                    piece = (choice.get('delta') or {}).get('content')
+                    if piece:
+                        yield piece
+
+    async def _request_completion(self, messages: List[Dict], max_tokens: int = 4096, temperature: float = 0.8,
+                                  top_p: float = 0.95, stream: bool = False, multimodal: bool = False) -> Dict:
+        """
+        Call MiniMax chatcompletion_v2 (aligned with docs).
+        Uses M1 defaults: max_tokens=8192, temp=1.0 (overridden here for control).
+        Handles base_resp errors, sensitive content, key rotation.
+        Supports multimodal content when multimodal=True.
+        """
+        if stream:
+            # Aggregate the SSE deltas for callers that want the whole completion back
+            content = ''.join([piece async for piece in self.stream_completion(
+                messages, max_tokens, temperature, top_p, multimodal
+            )])
+            return {'choices': [{'message': {'content': content}}], 'usage': {}}
+
+        headers = {"Content-Type": "application/json"}
+        payload = self._build_payload(messages, max_tokens, temperature, top_p, stream, multimodal)
+
+        # Exponential backoff with jitter, awaited so other repos keep moving; each attempt takes the next key
+        max_retries = max(5, len(self.api_keys))
+        retrying = AsyncRetrying(
+            wait=wait_exponential_jitter(initial=0.5, max=20),
+            stop=stop_after_attempt(max_retries),
+            retry=retry_if_exception_type((MiniMaxRetryableError, aiohttp.ClientError, asyncio.TimeoutError)),
+        )
+        try:
+            async for attempt in retrying:
+                with attempt:
+                    return await self._attempt_completion(headers, payload)
+        except RetryError as e:
+            raise Exception(f"MiniMax failed after {max_retries} attempts: {e.last_attempt.exception()}") from None
+
+    async def _attempt_completion(self, headers: Dict, payload: Dict) -> Dict:
+        """One POST on the next key; raises MiniMaxRetryableError for anything worth another try"""
+        key = self._get_next_key()
+        headers["Authorization"] = f"Bearer {key}"
+        session = await self.get_session()
+        async with self._sem, session.post(self.base_url, headers=headers, json=payload) as response:
+            status = response.status
+            if status == 200:
+                result = await response.json(loads=_json_loads, content_type=None)
+            else:
+                error_text = await response.text()
+
+        if status == 401:
+            logging.warning("Invalid key, rotating")
+            raise MiniMaxRetryableError("HTTP 401: invalid key")
+        if status == 429:
+            logging.warning("Rate limited, rotating + backoff")
+            self._cool_down(key)
+            raise MiniMaxRetryableError(f"HTTP 429: {error_text}")
+        if status != 200:
+            error = f"HTTP {status}: {error_text}"
+            logging.error(error)
+            if status >= 500:
+                raise MiniMaxRetryableError(error)
+            raise Exception(error)
+
+        # Check base_resp per docs
+        base_resp = result.get('base_resp', {})
+        if base_resp.get('status_code', 0) != 0:
+            error = f"MiniMax error {base_resp['status_code']}: {base_resp.get('status_msg', 'Unknown error')}"
+            logging.error(error)
+            if base_resp['status_code'] == 1008:  # Insufficient balance
+                raise ValueError("Insufficient MiniMax balance - check account")
+            if base_resp['status_code'] == 1002:  # Rate limit
+                self._cool_down(key)
+            raise MiniMaxRetryableError(error)
+
+        # Log sensitive content if any
+        if result.get('input_sensitive', False):
+            logging.warning(f"Input sensitive (type: {result.get('input_sensitive_type')})")
+        if result.get('output_sensitive', False):
+            logging.warning(f"Output sensitive (type: {result.get('output_sensitive_type')})")
+
+        # Extract content from choices[0] (streamed deltas never reach this path)
+        content = ''
+        choices = result.get('choices')
+        if choices:
+            content = choices[0].get('message', {}).get('content', '')
+
+        # Log usage (debug: this runs on every call)
+        usage = result.get('usage', {})
+        logging.debug(f"Tokens used: {usage.get('total_tokens', 0)} (prompt: {usage.get('prompt_tokens', 0)}, completion: {usage.get('completion_tokens', 0)})")
 
-        raise Exception(f"MiniMax failed after {max_retries} attempts: {last_error}")
+        return {
+            'choices': [{'message': {'content': content}}],
+            'usage': usage  # Expose for monitoring
+        }
 
 # ==============================================================================
 # Database Manager (as in my previous response - with new columns for images)
 # ==============================================================================
 
 class DatabaseManager:
+    # WAL + synchronous=NORMAL: commits append to the log instead of fsyncing the main file each time
+    PRAGMAS = (
+        "journal_mode=WAL",
+        "synchronous=NORMAL",
+        "temp_store=MEMORY",
+        "cache_size=-65536",
+        "mmap_size=268435456",
+        "busy_timeout=30000",
+    )
+    # Bind order of _entry_row; the placeholders are generated from it so the two can't drift apart
+    INSERT_COLUMNS = (
+        'repo_name', 'full_name', 'description', 'stars', 'forks', 'url', 'clone_url', 'last_updated',
+        'readme', 'main_file', 'file_preview', 'file_type', 'tech_stack', 'features', 'is_valid',
+        'category', 'ai_description', 'ai_features', 'ai_use_case', 'keywords', 'quality_score',
+        'freshness_days', 'processing_errors', 'processing_status', 'scraped_at',
+        'has_demo', 'demo_url', 'npm_package', 'license', 'related_links', 'agent_suggestions', 'ui_mods_score', 'images',
+    )
+    # Built once; the same string every batch, so sqlite3's statement cache reuses the prepared statement
+    INSERT_SQL = (f"INSERT OR REPLACE INTO themes ({', '.join(INSERT_COLUMNS)}) "
+                  f"VALUES ({', '.join('?' * len(INSERT_COLUMNS))})")
+
+    # query_top output: these columns, a few renamed, JSON decoded, NULL/empty falling back to defaults
+    TOP_COLUMNS = (
+        'repo_name', 'full_name', 'description', 'category', 'ai_use_case', 'stars', 'forks', 'url',
+        'file_type', 'keywords', 'ai_description', 'ai_features', 'processing_errors',
+        'quality_score', 'freshness_days', 'processing_status', 'has_demo', 'demo_url',
+        'npm_package', 'license', 'tech_stack', 'related_links', 'agent_suggestions', 'ui_mods_score', 'images',
+    )
+    TOP_RENAMES = MappingProxyType({'ai_use_case': 'use_case', 'processing_errors': 'errors', 'processing_status': 'status'})
+    TOP_JSON_FIELDS = (
+        ('keywords', list), ('ai_features', list), ('tech_stack', list), ('related_links', list),
+        ('agent_suggestions', dict), ('images', list),
+    )
+    TOP_DEFAULTS = (
+        ('repo_name', 'unknown'), ('description', ''), ('category', 'other'), ('use_case', 'General'),
+        ('stars', 0), ('forks', 0), ('url', ''), ('file_type', 'unknown'), ('ai_description', ''),
+        ('errors', None), ('quality_score', 0), ('freshness_days', 9999), ('status', 'scraped'),
+        ('demo_url', ''), ('npm_package', ''), ('license', ''), ('ui_mods_score', 0),
+    )
+
     def __init__(self, db_path: str):
         self.db_path = db_path
+        # One connection for the whole run: its page cache and mmap stay warm between batches
+        self._conn: Optional["aiosqlite.Connection"] = None
+        self._write_conn: Optional[sqlite3.Connection] = None  # Plain sqlite3, used from a worker thread
+        self._lock = asyncio.Lock()  # One batch at a time on _write_conn
+        self._connect_lock = asyncio.Lock()
         self._init_db()
 
     def _init_db(self):
         try:
             with sqlite3.connect(self.db_path, timeout=30) as conn:
                 cursor = conn.cursor()
+                for pragma in self.PRAGMAS:  # journal_mode=WAL persists on the file; the rest are per connection
+                    cursor.execute(f"PRAGMA {pragma}")
 
                 cursor.execute('''
                 CREATE TABLE IF NOT EXISTS themes (
@@ -498,7 +723,12 @@ class DatabaseManager:
 
                 # Indexes (includes new)
                 indexes = [
-                    'CREATE INDEX IF NOT EXISTS idx_category ON themes(category)',
+                    # query_top: equality columns lead, then its ORDER BY, so rows come out pre-sorted and the
+                    # LIMIT stops the scan early; stars/status trail so both filters are checked in the index
+                    'CREATE INDEX IF NOT EXISTS idx_query_top ON themes(category, is_valid, quality_score DESC, '
+                    'ui_mods_score DESC, stars DESC, processing_status)',
+                    'CREATE INDEX IF NOT EXISTS idx_query_top_all ON themes(is_valid, quality_score DESC, '
+                    'ui_mods_score DESC, stars DESC, processing_status)',
                     'CREATE INDEX IF NOT EXISTS idx_stars ON themes(stars DESC)',
                     'CREATE INDEX IF NOT EXISTS idx_full_name ON themes(full_name)',
                     'CREATE INDEX IF NOT EXISTS idx_freshness ON themes(freshness_days)',
@@ -508,8 +738,8 @@ class DatabaseManager:
                 ]
                 for idx in indexes:
                     cursor.execute(idx)
+                cursor.execute('DROP INDEX IF EXISTS idx_category')  # Prefix of idx_query_top
 
-                cursor.execute('PRAGMA vacuum;')
                 cursor.execute('ANALYZE themes;')
                 conn.commit()
                 logging.info("DB initialized")
@@ -519,61 +749,84 @@ class DatabaseManager:
 
     @asynccontextmanager
     async def get_connection(self):
-        conn = await aiosqlite.connect(self.db_path, timeout=30)
-        try:
-            yield conn
-        finally:
-            await conn.close()
+        # Read-only connection; writes go through _write_conn, so reads don't wait on _lock.
+        # The lock here only keeps concurrent first callers from opening two connections
+        if self._conn is None:
+            async with self._connect_lock:
+                if self._conn is None:
+                    conn = await aiosqlite.connect(self.db_path, timeout=30)
+                    for pragma in self.PRAGMAS:
+                        await conn.execute(f"PRAGMA {pragma}")
+                    self._conn = conn
+        yield self._conn
 
     async def batch_insert_or_update(self, entries: List[Dict]):
         if not entries:
             return
-        async with self.get_connection() as conn:
+        # One clock read per batch: naive local ISO for the stored timestamps, aware for freshness math
+        now_dt = datetime.now()
+        now_iso = now_dt.isoformat()
+        now_dt = now_dt.astimezone()
+        rows = [self._entry_row(self._validate_entry(entry, now_iso, now_dt)) for entry in entries]
+        await self.bulk_insert(rows)
+        logging.info(f"Batch insert {len(entries)} entries")
+
+    @staticmethod
+    def _entry_row(entry: Dict) -> tuple:
+        """Bind values for INSERT_SQL (INSERT_COLUMNS order) from a validated entry, long text truncated"""
+        return (
+            entry['repo_name'], entry['full_name'], entry['description'][:500],
+            entry['stars'], entry['forks'], entry['url'], entry['clone_url'],
+            entry['last_updated'], entry['readme'][:10000], entry['main_file'][:100000],
+            entry['file_preview'][:2000], entry['file_type'],
+            _json_dumps(entry['tech_stack']) if entry['tech_stack'] else _EMPTY_LIST_JSON,
+            _json_dumps(entry['features']) if entry['features'] else _EMPTY_LIST_JSON,
+            int(entry['is_valid']), entry['category'], entry['ai_description'][:500],
+            _json_dumps(entry['ai_features']) if entry['ai_features'] else _EMPTY_LIST_JSON,
+            entry['ai_use_case'][:300], _json_dumps(entry['keywords']) if entry['keywords'] else _EMPTY_LIST_JSON,
+            entry['quality_score'], entry['freshness_days'], entry['processing_errors'][:500],
+            entry['processing_status'], entry['scraped_at'],
+            int(entry['has_demo']), entry.get('demo_url', ''), entry.get('npm_package', ''),
+            entry.get('license', ''),
+            _json_dumps(links) if (links := entry.get('related_links')) else _EMPTY_LIST_JSON,
+            _json_dumps(suggestions) if (suggestions := entry.get('agent_suggestions')) else _EMPTY_DICT_JSON,
+            entry.get('ui_mods_score', 0),
+            _json_dumps(images) if (images := entry.get('images')) else _EMPTY_LIST_JSON
+        )
+
+    async def bulk_insert(self, rows: List[tuple]):
+        """Upsert prepared theme rows with one executemany in a single transaction (one commit per batch)"""
+        # The whole batch is a single thread hop into sync sqlite3, instead of one aiosqlite round trip per call
+        async with self._lock:
             try:
-                await conn.execute("BEGIN TRANSACTION")
-                for entry in entries:
-                    entry = self._validate_entry(entry)
-                    await conn.execute('''
-                    INSERT OR REPLACE INTO themes
-                    (repo_name, full_name, description, stars, forks, url, clone_url, last_updated,
-                    readme, main_file, file_preview, file_type, tech_stack, features, is_valid,
-                    category, ai_description, ai_features, ai_use_case, keywords, quality_score,
-                    freshness_days, processing_errors, processing_status, scraped_at,
-                    has_demo, demo_url, npm_package, license, related_links, agent_suggestions, ui_mods_score, images)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        entry['repo_name'], entry['full_name'], entry['description'][:500],
-                        entry['stars'], entry['forks'], entry['url'], entry['clone_url'],
-                        entry['last_updated'], entry['readme'][:10000], entry['main_file'][:100000],
-                        entry['file_preview'][:2000], entry['file_type'],
-                        json.dumps(entry['tech_stack']) if entry['tech_stack'] else '[]',
-                        json.dumps(entry['features']) if entry['features'] else '[]',
-                        int(entry['is_valid']), entry['category'], entry['ai_description'][:500],
-                        json.dumps(entry['ai_features']) if entry['ai_features'] else '[]',
-                        entry['ai_use_case'][:300], json.dumps(entry['keywords']) if entry['keywords'] else '[]',
-                        entry['quality_score'], entry['freshness_days'], entry['processing_errors'][:500],
-                        entry['processing_status'], entry['scraped_at'],
-                        int(entry['has_demo']), entry.get('demo_url', ''), entry.get('npm_package', ''),
-                        entry.get('license', ''),
-                        json.dumps(entry.get('related_links', [])),
-                        json.dumps(entry.get('agent_suggestions', {})),
-                        entry.get('ui_mods_score', 0),
-                        json.dumps(entry.get('images', []))
-                    ))
-                await conn.commit()
-                logging.info(f"Batch insert {len(entries)} entries")
+                await asyncio.to_thread(self._sync_batch_insert, rows)
             except Exception as e:
-                await conn.rollback()
                 logging.error(f"Batch insert failed: {e}")
                 raise DatabaseError(f"Batch insert error: {e}")
 
-    def _validate_entry(self, entry: Dict) -> Dict:
+    def _sync_batch_insert(self, rows: List[tuple]):
+        if self._write_conn is None:
+            # isolation_level=None: transactions are exactly the BEGIN/COMMIT below
+            self._write_conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None,
+                                               check_same_thread=False)
+            for pragma in self.PRAGMAS:
+                self._write_conn.execute(f"PRAGMA {pragma}")
+        conn = self._write_conn
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(self.INSERT_SQL, rows)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _validate_entry(self, entry: Dict, now_iso: str, now_dt: datetime) -> Dict:
         entry.setdefault('forks', 0)
         entry.setdefault('description', '')
         entry.setdefault('stars', 0)
         entry.setdefault('url', '')
         entry.setdefault('clone_url', '')
-        entry.setdefault('last_updated', datetime.now().isoformat())
+        entry.setdefault('last_updated', now_iso)
         entry.setdefault('readme', '')
         entry.setdefault('main_file', '')
         entry.setdefault('file_preview', '')
@@ -595,8 +848,8 @@ class DatabaseManager:
 
         # Calc quality
         entry['quality_score'] = self._calc_quality_score(entry)
-        entry['freshness_days'] = self._calc_freshness(entry.get('last_updated', ''))
-        entry['scraped_at'] = datetime.now().isoformat()
+        entry['freshness_days'] = self._calc_freshness(entry.get('last_updated', ''), now_dt)
+        entry['scraped_at'] = now_iso
         entry['repo_name'] = entry.get('repo_name', entry.get('full_name', '').split('/')[-1] or 'unknown')
         entry['processing_status'] = entry.get('processing_status', 'scraped')
 
@@ -649,13 +902,15 @@ class DatabaseManager:
         
         return min(100, score)
 
-    def _calc_freshness(self, updated_str: str) -> int:
+    def _calc_freshness(self, updated_str: str, now_dt: datetime) -> int:
+        """Days since updated_str; now_dt is tz-aware, naive timestamps are taken as local time"""
         if not updated_str:
             return 9999
         try:
             updated = datetime.fromisoformat(updated_str.replace('Z', '+00:00'))
-            now = datetime.now(updated.tzinfo)
-            days = int((now - updated).total_seconds() / 86400)
+            if updated.tzinfo is None:
+                updated = updated.astimezone()
+            days = int((now_dt - updated).total_seconds() / 86400)
             return max(0, days)
         except:
             return 9999
@@ -663,7 +918,8 @@ class DatabaseManager:
     async def get_processed_full_names(self) -> Set[str]:
         try:
             async with self.get_connection() as conn:
-                cursor = await conn.execute('SELECT full_name FROM themes WHERE processing_status != "error"')
+                # full_name is UNIQUE, so DISTINCT would be a no-op sort
+                cursor = await conn.execute("SELECT full_name FROM themes WHERE processing_status != 'error'")
                 return {row[0] for row in await cursor.fetchall()}
         except Exception as e:
             logging.error(f"Get processed names failed: {e}")
@@ -685,50 +941,21 @@ class DatabaseManager:
                     where.append('ui_mods_score > 10')
                 where_clause = ' AND '.join(where) if where else '1=1'
                 cursor = await conn.execute(f'''
-                SELECT repo_name, full_name, description, category, ai_use_case, stars, forks, url,
-                file_type, keywords, ai_description, ai_features, processing_errors,
-                quality_score, freshness_days, processing_status, has_demo, demo_url,
-                npm_package, license, tech_stack, related_links, agent_suggestions, ui_mods_score, images
+                SELECT {', '.join(self.TOP_COLUMNS)}
                 FROM themes
                 WHERE {where_clause} AND stars >= ? AND is_valid = 1 AND processing_status != 'error'
                 ORDER BY quality_score DESC, ui_mods_score DESC, stars DESC LIMIT ?
                 ''', params + [min_stars, top_n])
-                rows = await cursor.fetchall()
+                keys = [self.TOP_RENAMES.get(col, col) for col in self.TOP_COLUMNS]
                 themes = []
-                for row in rows:
-                    kw = json.loads(row[9] or '[]')
-                    feats = json.loads(row[11] or '[]')
-                    tech = json.loads(row[20] or '[]')
-                    links = json.loads(row[21] or '[]')
-                    suggestions = json.loads(row[22] or '{}')
-                    images = json.loads(row[24] or '[]')
-                    themes.append({
-                        'repo_name': row[0] or 'unknown',
-                        'full_name': row[1],
-                        'description': row[2] or '',
-                        'category': row[3] or 'other',
-                        'use_case': row[4] or 'General',
-                        'stars': row[5] or 0,
-                        'forks': row[6] or 0,
-                        'url': row[7] or '',
-                        'file_type': row[8] or 'unknown',
-                        'keywords': kw,
-                        'ai_description': row[10] or '',
-                        'ai_features': feats,
-                        'errors': row[12] or None,
-                        'quality_score': row[13] or 0,
-                        'freshness_days': row[14] or 9999,
-                        'status': row[15] or 'scraped',
-                        'has_demo': bool(row[16]),
-                        'demo_url': row[17] or '',
-                        'npm_package': row[18] or '',
-                        'license': row[19] or '',
-                        'tech_stack': tech,
-                        'related_links': links,
-                        'agent_suggestions': suggestions,
-                        'ui_mods_score': row[23] or 0,
-                        'images': images
-                    })
+                for row in await cursor.fetchall():
+                    theme = dict(zip(keys, row))
+                    for key, empty in self.TOP_JSON_FIELDS:
+                        theme[key] = _json_column(theme[key], empty)
+                    for key, default in self.TOP_DEFAULTS:
+                        theme[key] = theme[key] or default
+                    theme['has_demo'] = bool(theme['has_demo'])
+                    themes.append(theme)
                 return themes
         except Exception as e:
             logging.error(f"Query top failed: {e}")
@@ -759,7 +986,12 @@ class DatabaseManager:
             raise DatabaseError(f"Rebuild error: {e}")
 
     async def close(self):
-        pass
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
+        if self._write_conn is not None:
+            self._write_conn.close()
+            self._write_conn = None
 
 # ==============================================================================
 # Checkpoint Manager (unchanged)
@@ -779,13 +1011,13 @@ class CheckpointManager:
             'query_idx': query_idx
         }
         with open(self.checkpoint_file, 'w') as f:
-            json.dump(data, f, indent=2)
+            f.write(_json_dumps(data))
         logging.info("Checkpoint saved")
 
     def load(self) -> tuple[Set[str], Dict, int, Dict]:
         try:
-            with open(self.checkpoint_file, 'r') as f:
-                data = json.load(f)
+            with open(self.checkpoint_file, 'rb') as f:
+                data = _json_loads(f.read())
             return (
                 set(data.get('processed', [])),
                 data.get('start_pages', {}),
@@ -807,10 +1039,54 @@ class CheckpointManager:
 # ==============================================================================
 
 class ThemeAnalyzer:
+    AI_TOKENS_PER_REPO = 150  # Opening estimate of completion tokens per categorized repo
+    MAX_AI_CHUNK = 20  # Repos per categorize request, however cheap they turn out to be
+
     def __init__(self, minimax_client: Optional[MiniMaxClient] = None, config: Optional[Config] = None):
         self.minimax = minimax_client
         self.use_ai = minimax_client is not None
         self.config = config or Config()
+        self._tokens_per_repo = float(self.AI_TOKENS_PER_REPO)
+        # One matcher per rule table; each scans a text once instead of once per keyword
+        self.tech_matcher = self._build_matcher(self.config.TECH_KEYWORDS)
+        self.category_matcher = self._build_matcher(self.config.HEURISTIC_RULES)
+
+    @staticmethod
+    def _build_matcher(rules: Mapping[str, Tuple[str, ...]]):
+        """
+        Aho-Corasick automaton mapping each keyword to the rule keys it belongs to, or without
+        pyahocorasick, one compiled alternation per rule key (keywords are matched against lowercased text)
+        """
+        if not HAS_AHOCORASICK:
+            return {key: re.compile('|'.join(map(re.escape, (kw.lower() for kw in keywords))))
+                    for key, keywords in rules.items()}
+        keyword_keys: Dict[str, List[str]] = {}
+        for key, keywords in rules.items():
+            for kw in keywords:
+                keyword_keys.setdefault(kw.lower(), []).append(key)
+        automaton = ahocorasick.Automaton()
+        for kw, keys in keyword_keys.items():
+            automaton.add_word(kw, tuple(keys))
+        automaton.make_automaton()
+        return automaton
+
+    @staticmethod
+    def _matching_keys(matcher, rules: Mapping[str, Tuple[str, ...]], text: str) -> List[str]:
+        """Rule keys with any keyword occurring in (lowercased) text, in rule order"""
+        if isinstance(matcher, dict):
+            return [key for key, pattern in matcher.items() if pattern.search(text)]
+        hits = set()
+        for _, keys in matcher.iter(text):
+            hits.update(keys)
+        return [key for key in rules if key in hits]
+
+    def classify_heuristic(self, text: str) -> Optional[str]:
+        """First HEURISTIC_RULES category (in rule order) with a keyword in lowercased text"""
+        if isinstance(self.category_matcher, dict):
+            # Stop at the first category that hits instead of testing them all
+            return next((cat for cat, pattern in self.category_matcher.items() if pattern.search(text)), None)
+        matches = self._matching_keys(self.category_matcher, self.config.HEURISTIC_RULES, text)
+        return matches[0] if matches else None
 
     def analyze_files(self, files: List[Dict], repo_info: Dict, readme: str = '', html_content: str = '') -> Dict[str, Any]:
         result = {
@@ -836,10 +1112,7 @@ class ThemeAnalyzer:
         # Detect extensions/tech (original logic)
         file_extensions = {f.get('name', '').lower().split('.')[-1] for f in files if '.' in f.get('name', '')}
         content_sample = ' '.join(f.get('name', '') for f in files[:20]).lower()
-        tech_stack = []
-        for tech, keywords in self.config.TECH_KEYWORDS.items():
-            if any(kw in content_sample for kw in keywords):
-                tech_stack.append(tech)
+        tech_stack = self._matching_keys(self.tech_matcher, self.config.TECH_KEYWORDS, content_sample)
         if 'ts' in file_extensions or 'tsx' in file_extensions:
             tech_stack.append('typescript')
         if 'jsx' in file_extensions:
@@ -911,6 +1184,7 @@ class ThemeAnalyzer:
         links = []
         texts = [readme.lower()] if readme else []
         if self.config.SCRAPE_HTML and html_content and HAS_BS4:
+            from bs4 import BeautifulSoup  # Deferred so --help and offline paths don't pay for bs4
             soup = BeautifulSoup(html_content, 'html.parser')
             # Extract from README render, links, lists (e.g., Awesome lists)
             texts.append(soup.get_text().lower())
@@ -955,21 +1229,13 @@ class ThemeAnalyzer:
         images = []
         
         # Filter for image files
-        image_files = [f for f in files if any(f.get('name', '').lower().endswith(ext) for ext in self.config.IMAGE_EXTS)]
-        
-        # Prioritize important images
-        prioritized = []
-        others = []
-        
-        for img in image_files:
-            name_lower = img.get('name', '').lower()
-            if any(priority in name_lower for priority in self.config.IMAGE_PRIORITY):
-                prioritized.append(img)
-            else:
-                others.append(img)
+        image_exts = self.config.IMAGE_EXTS
+        image_files = [f for f in files if os.path.splitext(f.get('name', ''))[1].lower() in image_exts]
         
-        # Combine prioritized images first, then others
-        sorted_images = prioritized + others
+        # Prioritize important images by rank; sort is stable, so the rest keep listing order
+        priority = self.config.IMAGE_PRIORITY
+        unranked = len(priority)
+        sorted_images = sorted(image_files, key=lambda f: priority.get(f.get('name', '').lower(), unranked))
         
         # Limit to max images per repo
         for img in sorted_images[:self.config.MAX_IMAGES_PER_REPO]:
@@ -993,70 +1259,94 @@ class ThemeAnalyzer:
         return images
 
     async def ai_categorize_batch(self, entries: List[Dict]) -> List[Dict]:
-        """Original categorize + heuristic fallback with vision support."""
+        """Original categorize + heuristic fallback with vision support, several repos per request."""
         if not self.use_ai:
-            return [self._heuristic_categorize(entry) for entry in entries]
-        
-        try:
-            # Build multimodal content if vision is enabled
-            multimodal_content = []
-            prompt_text = (
-                f"Categorize these web/UI themes/mods. Categories: {', '.join(self.config.CATEGORIES)}. "
-                "For each: category, ai_description (brief), ai_features (list <=5), ai_use_case. "
-                "JSON array only, no extra text.\n\n"
-            )
-            
-            # Add text part
-            multimodal_content.append({"type": "text", "text": prompt_text})
-            
-            # Process each entry
             for entry in entries:
-                entry_text = (
-                    f"Repo: {entry['full_name']}\nDesc: {entry.get('description', '')}\n"
-                    f"Type: {entry.get('file_type', 'unknown')}\nTech: {', '.join(entry.get('tech_stack', []))}\n"
-                    f"Keywords: {', '.join(entry.get('keywords', []))}\nLinks: {len(entry.get('related_links', []))}\n"
-                )
-                multimodal_content.append({"type": "text", "text": entry_text})
-                
-                # Add images if available
-                if self.config.VISION_ENABLED and entry.get('images'):
-                    for img in entry['images'][:self.config.MAX_IMAGES_PER_REPO]:
-                        if img.get('url'):
-                            multimodal_content.append({
-                                "type": "image_url",
-                                "image_url": {"url": img['url']}
-                            })
-                
-                multimodal_content.append({"type": "text", "text": "---\n"})
-            
-            response = self.minimax.chat_completion(
-                messages=[
-                    {"role": "system", "content": "You categorize web themes/UI/mods. Respond with valid JSON array."},
-                    {"role": "user", "content": multimodal_content if self.config.VISION_ENABLED else prompt_text}
-                ],
-                max_tokens=self.config.AGENTIC_MAX_TOKENS,
-                temperature=0.7,
-                multimodal=self.config.VISION_ENABLED
-            )
-            
-            raw_output = response['choices'][0]['message']['content']
-            results = self._extract_json(raw_output)
-            
-            for entry, result in zip(entries, results + [{}] * (len(entries) - len(results))): # Pad if short
-                if result:
-                    entry.update({
-                        'category': result.get('category', 'other'),
-                        'ai_description': result.get('ai_description', ''),
-                        'ai_features': result.get('ai_features', []),
-                        'ai_use_case': result.get('ai_use_case', 'General theme')
-                    })
-                else:
-                    entry.update(self._heuristic_categorize(entry))
-            
+                entry.update(self._heuristic_categorize(entry))
             return entries
-        except Exception as e:
-            logging.error(f"AI categorize failed: {e}")
-            return [self._heuristic_categorize(entry) for entry in entries]
+
+        # Chunks go out concurrently; the client spreads them over its keys
+        size = self._ai_chunk_size()
+        chunks = [entries[i:i + size] for i in range(0, len(entries), size)]
+        results = await asyncio.gather(*(self._categorize_chunk(chunk) for chunk in chunks),
+                                       return_exceptions=True)
+        for chunk, result in zip(chunks, results):
+            if isinstance(result, Exception):
+                logging.error(f"AI categorize failed: {result}")
+                for entry in chunk:
+                    entry.update(self._heuristic_categorize(entry))
+        return entries
+
+    def _ai_chunk_size(self) -> int:
+        """Repos per categorize request: as many as the completion budget fits at the measured tokens/repo"""
+        budget = int(self.config.AGENTIC_MAX_TOKENS * 0.8)  # Headroom for a wordier-than-usual reply
+        return max(1, min(self.MAX_AI_CHUNK, budget // max(1, int(self._tokens_per_repo))))
+
+    async def _categorize_chunk(self, chunk: List[Dict]):
+        """One MiniMax call for a chunk; replies are matched back to entries by id"""
+        prompt_text = (
+            f"Categorize these web/UI themes/mods. Categories: {', '.join(self.config.CATEGORIES)}. "
+            "For each repo (keep its id): id, category, ai_description (brief), ai_features (list <=5), ai_use_case. "
+            "JSON array only, no extra text.\n\n"
+        )
+        multimodal_content = [{"type": "text", "text": prompt_text}]
+        entry_texts = []
+        for i, entry in enumerate(chunk):
+            entry_text = (
+                f"id: {i}\nRepo: {entry['full_name']}\nDesc: {entry.get('description', '')}\n"
+                f"Type: {entry.get('file_type', 'unknown')}\nTech: {', '.join(entry.get('tech_stack', []))}\n"
+                f"Keywords: {', '.join(entry.get('keywords', []))}\nLinks: {len(entry.get('related_links', []))}\n"
+            )
+            entry_texts.append(entry_text + "---\n")
+            multimodal_content.append({"type": "text", "text": entry_text})
+
+            # Add images if available
+            if self.config.VISION_ENABLED and entry.get('images'):
+                for img in entry['images'][:self.config.MAX_IMAGES_PER_REPO]:
+                    if img.get('url'):
+                        multimodal_content.append({
+                            "type": "image_url",
+                            "image_url": {"url": img['url']}
+                        })
+
+            multimodal_content.append({"type": "text", "text": "---\n"})
+
+        response = await self.minimax.chat_completion(
+            messages=[
+                {"role": "system", "content": "You categorize web themes/UI/mods. Respond with valid JSON array."},
+                {"role": "user", "content": multimodal_content if self.config.VISION_ENABLED else prompt_text + ''.join(entry_texts)}
+            ],
+            max_tokens=self.config.AGENTIC_MAX_TOKENS,
+            temperature=0.7,
+            multimodal=self.config.VISION_ENABLED,
+            cache=True  # Same repos in, any valid categorization out; no need to pay twice
+        )
+
+        # Track completion tokens per repo so the next chunk is sized to fit the budget
+        completion_tokens = (response.get('usage') or {}).get('completion_tokens', 0)
+        if completion_tokens:
+            self._tokens_per_repo = 0.7 * self._tokens_per_repo + 0.3 * (completion_tokens / len(chunk))
+
+        results = self._extract_json(response['choices'][0]['message']['content'])
+        by_id = {}
+        for pos, result in enumerate(results):
+            if isinstance(result, dict):
+                try:
+                    by_id[int(result.get('id', pos))] = result
+                except (TypeError, ValueError):
+                    by_id[pos] = result
+
+        for i, entry in enumerate(chunk):
+            result = by_id.get(i)
+            if result:
+                entry.update({
+                    'category': result.get('category', 'other'),
+                    'ai_description': result.get('ai_description', ''),
+                    'ai_features': result.get('ai_features', []),
+                    'ai_use_case': result.get('ai_use_case', 'General theme')
+                })
+            else:
+                entry.update(self._heuristic_categorize(entry))
 
     # NEW: Agentic reasoning batch (uses M1 for step-by-step thinking with vision)
     async def agentic_reasoning_batch(self, entries: List[Dict], previous_suggestions: Dict = {}) -> tuple[List[Dict], Dict]:
@@ -1080,7 +1370,7 @@ class ThemeAnalyzer:
                 "Previous suggestions: {prev_sugg}\n\n"
                 f"Categories: {', '.join(self.config.CATEGORIES)}\n\n".format(
                     categories=', '.join(self.config.CATEGORIES), 
-                    prev_sugg=json.dumps(previous_suggestions)
+                    prev_sugg=_json_dumps(previous_suggestions)
                 )
             )
             
@@ -1088,7 +1378,7 @@ class ThemeAnalyzer:
             
             # Append batch data (summarize to fit context: ~50k tokens total)
             for i, entry in enumerate(entries[:self.config.AI_BATCH_SIZE], 1):
-                links_str = json.dumps(entry.get('related_links', [])[:10]) # Top 10 links
+                links_str = _json_dumps(entry.get('related_links', [])[:10]) # Top 10 links
                 entry_text = (
                     f"Repo {i}: {entry['full_name']}\nDesc: {entry.get('description', '')[:500]}\n"
                     f"Files: {entry.get('file_type', '')}, Tech: {', '.join(entry.get('tech_stack', [])[:5])}\n"
@@ -1111,7 +1401,7 @@ class ThemeAnalyzer:
             model = self.config.VISION_MODEL if self.config.VISION_ENABLED and any(entry.get('images') for entry in entries) else self.config.MINIMAX_MODEL
             
             # Call model with higher temp for creative suggestions, larger tokens
-            response = self.minimax.chat_completion(
+            response = await self.minimax.chat_completion(
                 messages=[
                     {"role": "system", "content": "Reason step-by-step as an agentic UI/mods scraper with vision. Output strict JSON."},
                     {"role": "user", "content": multimodal_content if self.config.VISION_ENABLED else prompt_text}
@@ -1168,7 +1458,7 @@ class ThemeAnalyzer:
             # Handle possible JSON array or single object
             json_str = re.search(r'\{.*\}|\[.*\]', raw, re.DOTALL)
             if json_str:
-                return json.loads(json_str.group()) if json_str.group().startswith('[') else [json.loads(json_str.group())]
+                return _json_loads(json_str.group()) if json_str.group().startswith('[') else [_json_loads(json_str.group())]
             return []
         except:
             return []
@@ -1178,16 +1468,17 @@ class ThemeAnalyzer:
             entry.get('description', '') + ' ' + ' '.join(entry.get('keywords', [])) + ' ' +
             entry.get('file_type', '') + ' ' + ' '.join(entry.get('tech_stack', []))
         ).lower()
-        for cat, keywords in self.config.HEURISTIC_RULES.items():
-            if any(kw in text for kw in keywords):
-                return {
-                    'category': cat,
-                    'ai_description': f"Heuristic: {cat.replace('_', ' ').title()}",
-                    'ai_features': keywords[:5],
-                    'ai_use_case': f"Use for {cat.replace('_', ' ')}",
-                    'ui_mods_score': 10 if cat in ['ui_component', 'modular_theme'] else 0,
-                    'related_links': entry.get('related_links', []) # Preserve
-                }
+        cat = self.classify_heuristic(text)
+        if cat:
+            keywords = self.config.HEURISTIC_RULES[cat]
+            return {
+                'category': cat,
+                'ai_description': f"Heuristic: {cat.replace('_', ' ').title()}",
+                'ai_features': keywords[:5],
+                'ai_use_case': f"Use for {cat.replace('_', ' ')}",
+                'ui_mods_score': 10 if cat in ['ui_component', 'modular_theme'] else 0,
+                'related_links': entry.get('related_links', []) # Preserve
+            }
         return {
             'category': 'other',
             'ai_description': 'General web theme',
@@ -1202,6 +1493,30 @@ class ThemeAnalyzer:
 # ==============================================================================
 
 class GitHubFetcher:
+    GRAPHQL_URL = "https://api.github.com/graphql"
+    REST_PAGE_SIZE = 100
+    # Each node carries README text and the root tree, so big pages hit GraphQL's timeout/node limits
+    GRAPHQL_PAGE_SIZE = 25
+    # One search page: repo metadata plus its root listing and README, all in a single request
+    SEARCH_QUERY = """
+    query($q: String!, $first: Int!, $after: String) {
+      rateLimit { remaining resetAt cost }
+      search(query: $q, type: REPOSITORY, first: $first, after: $after) {
+        pageInfo { hasNextPage endCursor }
+        nodes {
+          ... on Repository {
+            nameWithOwner name description stargazerCount forkCount url updatedAt
+            licenseInfo { spdxId }
+            readme: object(expression: "HEAD:README.md") { ... on Blob { text } }
+            tree: object(expression: "HEAD:") {
+              ... on Tree { entries { name path type object { ... on Blob { byteSize } } } }
+            }
+          }
+        }
+      }
+    }
+    """
+
     def __init__(self, token: Optional[str] = None, rate_limiter: Optional[RateLimiter] = None):
         self.token = token
         self.rate_limiter = rate_limiter
@@ -1215,11 +1530,16 @@ class GitHubFetcher:
 
     async def get_session(self):
         if not self._session or self._session.closed:
-            connector = aiohttp.TCPConnector(limit=100, limit_per_host=30)
+            # Lives for the whole scrape; ttl_dns_cache avoids re-resolving api.github.com
+            connector = aiohttp.TCPConnector(limit=100, limit_per_host=30, ttl_dns_cache=300, keepalive_timeout=75)
             timeout = aiohttp.ClientTimeout(total=30)
-            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout, json_serialize=_json_dumps)
         return self._session
 
+    async def start(self):
+        """Open the shared session up front; it's closed once, on shutdown"""
+        await self.get_session()
+
     async def close(self):
         if self._session and not self._session.closed:
             await self._session.close()
@@ -1232,8 +1552,10 @@ class GitHubFetcher:
         session = await self.get_session()
         try:
             async with session.get(url, headers=self.base_headers, params=params) as resp:
+                if self.rate_limiter:
+                    self.rate_limiter.update_from_headers(resp.headers)
                 if resp.status == 200:
-                    return await resp.json()
+                    return await resp.json(loads=_json_loads)
                 elif resp.status == 403:
                     raise RateLimitError("Rate limit exceeded")
                 elif resp.status == 404:
@@ -1250,7 +1572,8 @@ class GitHubFetcher:
             url = f"https://api.github.com/repos/{full_name}/readme"
             data = await self._fetch_json(url)
             if data and data.get('content'):
-                return base64.b64decode(data['content']).decode('utf-8', errors='ignore')
+                # a2b_base64 skips the API's line-wrap newlines itself; no b64decode wrapper
+                return binascii.a2b_base64(data['content']).decode('utf-8', errors='ignore')
             return ''
         except Exception as e:
             logging.debug(f"README fetch failed for {full_name}: {e}")
@@ -1270,34 +1593,134 @@ class GitHubFetcher:
             logging.debug(f"HTML fetch failed for {full_name}: {e}")
             return ''
 
+    async def graphql_search(self, query: str, first: int = GRAPHQL_PAGE_SIZE,
+                             after: Optional[str] = None) -> Optional[Dict]:
+        """One GraphQL search page (None once retries are exhausted; GraphQL requires a token)"""
+        variables = {'q': f"{query} sort:stars-desc", 'first': first, 'after': after}
+        try:
+            data = await self._post_graphql({'query': self.SEARCH_QUERY, 'variables': variables})
+        except Exception as e:
+            logging.warning(f"GraphQL search failed for '{query}': {e}")
+            return None
+        if self.rate_limiter:
+            self.rate_limiter.update_from_graphql(data.get('rateLimit'))
+        return data['search']
+
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=4, max=10), reraise=True,
+           retry=retry_if_exception_type((aiohttp.ClientError, asyncio.TimeoutError, GitHubAPIError)))
+    async def _post_graphql(self, payload: Dict) -> Dict:
+        """POST a GraphQL query; raises (and is retried) on a non-200 or a reply without search data"""
+        if self.rate_limiter:
+            await self.rate_limiter.check_and_wait(graphql=True)
+        session = await self.get_session()
+        async with session.post(self.GRAPHQL_URL, headers=self.base_headers, json=payload) as resp:
+            if resp.status != 200:
+                raise GitHubAPIError(f"GraphQL HTTP {resp.status}")
+            body = await resp.json(loads=_json_loads)
+        data = body.get('data') or {}
+        # Partial data alongside 'errors' is still usable; a timed-out query has no search at all
+        if not data.get('search'):
+            raise GitHubAPIError(f"GraphQL errors: {body.get('errors')}")
+        return data
+
+    @staticmethod
+    def _repo_from_node(node: Dict) -> Dict:
+        """Map a GraphQL Repository node onto the REST-shaped repo_info the pipeline uses"""
+        full_name = node.get('nameWithOwner', '')
+        files = []
+        for entry in ((node.get('tree') or {}).get('entries') or [])[:50]:
+            is_blob = entry.get('type') == 'blob'
+            files.append({
+                'name': entry.get('name', ''),
+                'path': entry.get('path', ''),
+                'type': 'file' if is_blob else 'dir',
+                'size': ((entry.get('object') or {}).get('byteSize') or 0),
+                'download_url': f"https://raw.githubusercontent.com/{full_name}/HEAD/{entry.get('path', '')}" if is_blob else None,
+            })
+        repo_info = {
+            'full_name': full_name,
+            'repo_name': node.get('name', ''),
+            'description': node.get('description', '') or '',
+            'stars': node.get('stargazerCount', 0),
+            'forks': node.get('forkCount', 0),
+            'url': node.get('url', ''),
+            'clone_url': f"{node['url']}.git" if node.get('url') else '',
+            'last_updated': node.get('updatedAt', ''),
+            'license': (node.get('licenseInfo') or {}).get('spdxId', '') or '',
+            'files': files,
+        }
+        readme = (node.get('readme') or {}).get('text')
+        if readme is not None:
+            repo_info['readme'] = readme
+        return repo_info
+
     async def discover_repos_stream(self, queries: List[str], max_repos: int, start_page: int = 1) -> AsyncIterator[Dict]:
-        per_page = 100
         repos_fetched = 0
         for query in queries:
-            page = start_page
-            while repos_fetched < max_repos:
-                params = {'q': query, 'sort': 'stars', 'order': 'desc', 'per_page': per_page, 'page': page}
-                data = await self._fetch_json('https://api.github.com/search/repositories', params)
-                items = data.get('items', [])
-                if not items:
+            if repos_fetched >= max_repos:
+                break
+            if self.token:
+                source = self._discover_graphql(query, start_page)
+            else:
+                source = self._discover_rest(query, start_page)
+            async for repo_info in source:
+                yield repo_info
+                repos_fetched += 1
+                if repos_fetched >= max_repos:
+                    await source.aclose()
                     break
-                for repo in items:
-                    if repos_fetched >= max_repos:
-                        break
-                    repo_info = {
-                        'full_name': repo.get('full_name', ''),
-                        'repo_name': repo.get('name', ''),
-                        'description': repo.get('description', '') or '',
-                        'stars': repo.get('stargazers_count', 0),
-                        'forks': repo.get('forks_count', 0),
-                        'url': repo.get('html_url', ''),
-                        'clone_url': repo.get('clone_url', ''),
-                        'last_updated': repo.get('updated_at', ''),
-                        'license': repo.get('license', {}).get('spdx_id', '') if repo.get('license') else ''
-                    }
+
+    async def _discover_rest(self, query: str, start_page: int = 1, skip: int = 0) -> AsyncIterator[Dict]:
+        """REST search for one query, from start_page (pages of REST_PAGE_SIZE), skipping its first `skip` items"""
+        page = start_page
+        while True:
+            params = {'q': query, 'sort': 'stars', 'order': 'desc', 'per_page': self.REST_PAGE_SIZE, 'page': page}
+            data = await self._fetch_json('https://api.github.com/search/repositories', params)
+            items = data.get('items', [])
+            if not items:
+                break
+            for repo in items[skip:]:
+                repo_info = {
+                    'full_name': repo.get('full_name', ''),
+                    'repo_name': repo.get('name', ''),
+                    'description': repo.get('description', '') or '',
+                    'stars': repo.get('stargazers_count', 0),
+                    'forks': repo.get('forks_count', 0),
+                    'url': repo.get('html_url', ''),
+                    'clone_url': repo.get('clone_url', ''),
+                    'last_updated': repo.get('updated_at', ''),
+                    'license': repo.get('license', {}).get('spdx_id', '') if repo.get('license') else ''
+                }
+                yield repo_info
+            skip = 0
+            page += 1
+
+    async def _discover_graphql(self, query: str, start_page: int = 1) -> AsyncIterator[Dict]:
+        """GraphQL twin of _discover_rest; repos arrive with files and README attached"""
+        # start_page counts REST pages; cursors can't jump, so walk past what a resumed run already did
+        to_skip = (start_page - 1) * self.REST_PAGE_SIZE
+        consumed = 0  # Search results passed so far (skipped or yielded), to resume REST at the same spot
+        after = None
+        while True:
+            search = await self.graphql_search(query, self.GRAPHQL_PAGE_SIZE, after)
+            if search is None:
+                logging.warning(f"GraphQL discovery failed for '{query}', continuing over REST")
+                async for repo_info in self._discover_rest(query, consumed // self.REST_PAGE_SIZE + 1,
+                                                           consumed % self.REST_PAGE_SIZE):
                     yield repo_info
-                    repos_fetched += 1
-                page += 1
+                return
+            for node in search.get('nodes') or []:
+                consumed += 1
+                if not node:
+                    continue
+                if to_skip:
+                    to_skip -= 1
+                    continue
+                yield self._repo_from_node(node)
+            page_info = search.get('pageInfo') or {}
+            if not page_info.get('hasNextPage'):
+                break
+            after = page_info.get('endCursor')
 
     async def fetch_repo_info(self, full_name: str) -> Optional[Dict]:
         try:
@@ -1335,11 +1758,12 @@ class ThemeScraperAgent:
         minimax_client = None
         if config.USE_AI:
             try:
-                minimax_client = MiniMaxClient(config.MINIMAX_API_KEYS, model=self.model)
+                minimax_client = MiniMaxClient(config.MINIMAX_API_KEYS, model=self.model,
+                                               max_connections=config.MAX_CONCURRENT)
                 logging.info(f"MiniMax-{model} client initialized for {'agentic' if config.AGENTIC_MODE else 'standard'} mode")
             except Exception as e:
                 logging.error(f"MiniMax init failed: {e}")
-                config.MINIMAX_API_KEYS = [] # Disable AI
+                config.MINIMAX_API_KEYS = () # Disable AI
         self.analyzer = ThemeAnalyzer(minimax_client, config)
         self.semaphore = asyncio.Semaphore(config.MAX_CONCURRENT)
         self.shutdown_flag = False
@@ -1357,7 +1781,7 @@ class ThemeScraperAgent:
                 return
         print("✅ GitHub token OK")
         if self.config.USE_AI:
-            print(f"✅ MiniMax-{self.model} enabled ({len([k for k in self.config.MINIMAX_API_KEYS if k])} keys, agentic: {self.config.AGENTIC_MODE}, vision: {self.config.VISION_ENABLED})")
+            print(f"✅ MiniMax-{self.model} enabled ({len(self.config.MINIMAX_API_KEYS)} keys, agentic: {self.config.AGENTIC_MODE}, vision: {self.config.VISION_ENABLED})")
         else:
             print("ℹ️ No AI - heuristics only")
         if input_file:
@@ -1383,7 +1807,7 @@ class ThemeScraperAgent:
 
         # Queries: default + custom + dynamic (agentic)
         base_queries = [custom_query] if custom_query else self.config.DEFAULT_QUERIES
-        queries = base_queries.copy()
+        queries = list(base_queries)
         if self.config.AGENTIC_MODE:
             queries += self.config.UI_MODS_QUERIES # Start with UI focus
         logging.info(f"Queries: {len(queries)} base")
@@ -1505,15 +1929,16 @@ class ThemeScraperAgent:
         async def enrich_repo(repo_info: Dict) -> Dict:
             async with self.semaphore:
                 try:
-                    # Fetch files
-                    contents_url = f"https://api.github.com/repos/{repo_info['full_name']}/contents"
-                    contents = await self.fetcher._fetch_json(contents_url)
-                    if isinstance(contents, list):
-                        repo_info['files'] = contents[:50]
+                    # Repos from the GraphQL search already carry their files (and usually README)
+                    if 'files' not in repo_info:
+                        contents_url = f"https://api.github.com/repos/{repo_info['full_name']}/contents"
+                        contents = await self.fetcher._fetch_json(contents_url)
+                        if isinstance(contents, list):
+                            repo_info['files'] = contents[:50]
 
                     # Fetch README + HTML for links
-                    readme = await self.fetcher.fetch_readme(repo_info['full_name'])
-                    repo_info['readme'] = readme
+                    if 'readme' not in repo_info:
+                        repo_info['readme'] = await self.fetcher.fetch_readme(repo_info['full_name'])
                     html = await self.fetcher.fetch_repo_html(repo_info['full_name'])
                     repo_info['html_content'] = html
 
@@ -1578,8 +2003,11 @@ class ThemeScraperAgent:
         }
 
         # JSON
-        with open('themes_report.json', 'w') as f:
-            json.dump(output, f, indent=2)
+        with open('themes_report.json', 'wb') as f:
+            if HAS_ORJSON:
+                f.write(orjson.dumps(output, option=orjson.OPT_INDENT_2))
+            else:
+                f.write(json.dumps(output, indent=2).encode())
 
         # Markdown (enhanced)
         with open('themes_report.md', 'w') as f:
@@ -1641,8 +2069,17 @@ class ThemeScraperAgent:
 
         logging.info("Exports: themes_report.json/md, ui_mods_links.csv, repo_images.csv")
 
+    async def __aenter__(self):
+        await self.fetcher.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.cleanup()
+
     async def cleanup(self):
         await self.fetcher.close()
+        if self.analyzer.minimax:
+            await self.analyzer.minimax.close()
         await self.db.close()
 
 # ==============================================================================
@@ -1672,7 +2109,7 @@ def main():
     if args.db:
         config.DB_PATH = args.db
     if args.no_ai:
-        config.MINIMAX_API_KEYS = []
+        config.MINIMAX_API_KEYS = ()
     config.AGENTIC_MODE = args.agentic_mode
     config.SCRAPE_HTML = not args.no_html and HAS_BS4
     config.MINIMAX_MODEL = args.model
@@ -1685,16 +2122,13 @@ def main():
     config.validate()
 
     async def run_async():
-        agent = ThemeScraperAgent(config, model=args.model)
-        try:
+        async with ThemeScraperAgent(config, model=args.model) as agent:
             await agent.run(
                 max_repos=args.max_repos,
                 resume=args.resume,
                 custom_query=args.query,
                 input_file=args.input_file
             )
-        finally:
-            await agent.cleanup()
 
     try:
         asyncio.run(run_async())